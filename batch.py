@@ -0,0 +1,224 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from city import City
+from load_planner import LoadPlanner
+from packages import Packages, parse_time
+from simulation import simulate
+from truck import Truck
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, the tables are written as CSV without it.
+    pa = pq = None
+
+# The city of a worker process, loaded once by _init_worker.
+_city: City | None = None
+
+
+class Scenario(NamedTuple):
+    day: str
+    depot: int
+    packages_fp: str
+    departures: list
+
+
+def read_scenarios(fname: str) -> list[Scenario]:
+    """
+    Reads the scenarios to plan from a CSV with the columns day, depot, packages and departures.
+
+    departures lists the earliest departure time of every truck, separated by semicolons (for example
+    "8:00 am;9:05 am;10:20 am"); the trucks are numbered from 1 in that order. Package file paths are relative to
+    the scenario file.
+
+    Raises:
+        ValueError: If a row is missing a column or has a malformed depot or time.
+    """
+
+    base = os.path.dirname(os.path.abspath(fname))
+    scenarios = []
+    with open(fname, mode="r", newline="", encoding="utf-8-sig") as file:
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                scenarios.append(
+                    Scenario(
+                        day=row["day"],
+                        depot=int(row["depot"]),
+                        packages_fp=os.path.join(base, row["packages"]),
+                        departures=[parse_time(text) for text in row["departures"].split(";")],
+                    )
+                )
+            except (KeyError, TypeError, ValueError) as error:
+                raise ValueError(f"{fname}, line {line_number}: {error}") from error
+    return scenarios
+
+
+def _init_worker(adj_mat_fp: str, locations_fp: str | None) -> None:
+    global _city
+    _city = City(adj_mat_fp, locations_fp)
+
+
+def plan_scenario(scenario: Scenario, city: City | None = None) -> tuple[list[dict], dict]:
+    """
+    Plans one day at one depot: loads the packages, assigns them to trucks with LoadPlanner and simulates the
+    routes.
+
+    Args:
+        scenario (Scenario): The day to plan.
+        city (City, optional): The city to plan in. Defaults to the city loaded by the worker process.
+
+    Returns:
+        tuple[list[dict], dict]: One row per truck stop, and one row of KPIs for the scenario. A scenario that cannot
+            be planned has no stops and its error in the KPIs.
+    """
+
+    city = city or _city
+    started = time.perf_counter()
+    kpis = {
+        "day": scenario.day,
+        "depot": scenario.depot,
+        "packages": 0,
+        "malformed_rows": 0,
+        "trucks": 0,
+        "miles": 0.0,
+        "late_packages": 0,
+        "finish_time": None,
+        "planning_seconds": 0.0,
+        "error": "",
+    }
+
+    try:
+        packages = Packages(scenario.packages_fp, city=city)
+        trucks = {truck_id: departure for truck_id, departure in enumerate(scenario.departures, start=1)}
+        planner = LoadPlanner(city, packages, trucks, depot=scenario.depot)
+        # A scenario that cannot meet every deadline is still planned, its late packages counted below.
+        loads = planner.plan(allow_late=True)
+    except (OSError, KeyError, ValueError) as error:
+        kpis["error"] = str(error)
+        kpis["planning_seconds"] = time.perf_counter() - started
+        return [], kpis
+
+    fleet = []
+    for load in loads:
+        manifest = [packages[id] for id in load.package_ids]
+        truck = Truck(
+            load.truck_id, manifest, city, load.departure, depot=scenario.depot, profile=planner.profiles[load.truck_id]
+        )
+        truck.route = load.route
+        truck.route_length = truck.get_route_length()
+        fleet.append(truck)
+    log = simulate(city, fleet)
+
+    deadlines = {pkg.id: pkg.deadline for truck in fleet for pkg in truck.packages}
+    departures = {truck.id: truck.start_time for truck in fleet}
+    stops = []
+    for event in log:
+        stops.append(
+            {
+                "day": scenario.day,
+                "depot": scenario.depot,
+                "truck_id": event.truck_id,
+                "departure": departures[event.truck_id],
+                "node": event.node,
+                "arrival": event.time,
+                "miles": event.miles,
+                "package_ids": ";".join(str(id) for id in event.package_ids),
+            }
+        )
+        kpis["late_packages"] += sum(1 for id in event.package_ids if deadlines[id] < event.time)
+
+    kpis["packages"] = len(packages)
+    kpis["malformed_rows"] = len(packages.errors)
+    kpis["trucks"] = len(fleet)
+    kpis["miles"] = sum(truck.route_length for truck in fleet)
+    kpis["finish_time"] = log.times[-1] if len(log) else None
+    kpis["planning_seconds"] = time.perf_counter() - started
+    return stops, kpis
+
+
+def write_table(rows: list[dict], path: str) -> str:
+    """
+    Writes rows to path as a Parquet file if pyarrow is installed, or as a CSV otherwise.
+
+    Args:
+        rows (list[dict]): The rows, all with the same keys.
+        path (str): The output path without an extension.
+
+    Returns:
+        str: The path of the file written.
+    """
+
+    if pq is not None:
+        path += ".parquet"
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        return path
+
+    path += ".csv"
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        if rows:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return path
+
+
+def run(
+    scenarios: list[Scenario],
+    adj_mat_fp: str,
+    locations_fp: str | None,
+    out_dir: str,
+    processes: int | None = None,
+) -> tuple[str, str]:
+    """
+    Plans every scenario, in parallel worker processes, and writes the stops and KPIs of all of them.
+
+    The scenarios are independent, so each one is planned by whichever worker is free; every worker loads the
+    city once. With processes=1 everything runs in this process.
+
+    Args:
+        scenarios (list[Scenario]): The days and depots to plan.
+        adj_mat_fp (str): The file path of the adjacency matrix (CSV or binary distance file).
+        locations_fp (str | None): The file path of the locations table.
+        out_dir (str): The directory the stops and kpis tables are written to.
+        processes (int, optional): The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        tuple[str, str]: The paths of the stops table and the KPIs table.
+    """
+
+    if processes == 1:
+        city = City(adj_mat_fp, locations_fp)
+        results = [plan_scenario(scenario, city) for scenario in scenarios]
+    else:
+        with ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(adj_mat_fp, locations_fp)
+        ) as executor:
+            results = list(executor.map(plan_scenario, scenarios))
+
+    os.makedirs(out_dir, exist_ok=True)
+    stops = [stop for scenario_stops, _ in results for stop in scenario_stops]
+    kpis = [scenario_kpis for _, scenario_kpis in results]
+    return (
+        write_table(stops, os.path.join(out_dir, "stops")),
+        write_table(kpis, os.path.join(out_dir, "kpis")),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plans many days and depots of packages in one batch.")
+    parser.add_argument("scenarios", help="CSV with the columns day, depot, packages and departures")
+    parser.add_argument("--distances", default="distances.csv", help="adjacency matrix (CSV or binary)")
+    parser.add_argument("--locations", default="locations.csv", help="locations table")
+    parser.add_argument("--out", default="plans", help="output directory")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    stops_fp, kpis_fp = run(
+        read_scenarios(args.scenarios), args.distances, args.locations, args.out, args.processes
+    )
+    print(f"Wrote {stops_fp} and {kpis_fp}.")
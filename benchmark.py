@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from city import City
+from hash_table import HashTable
+from packages import Packages
+from synthetic import write_city, write_manifest
+from truck import Truck
+
+# Larger cities are only benchmarked from the binary distance file; a CSV matrix that size does not fit in memory.
+_CSV_LIMIT = 5_000
+
+BASELINES_FP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baselines.json")
+
+# The sizes of the generated inputs at each scale. "small" runs in seconds and is the one with stored baselines;
+# "large" is the scale the code is meant to handle and takes a long time and several gigabytes of disk.
+SCALES = {
+    "small": {"nodes": 500, "clusters": 0, "packages": 20_000, "operations": 100_000, "truck": 300, "queries": 1_000},
+    "clustered": {"nodes": 500, "clusters": 12, "packages": 20_000, "operations": 100_000, "truck": 300, "queries": 1_000},
+    "large": {
+        "nodes": 50_000,
+        "clusters": 0,
+        "packages": 1_000_000,
+        "operations": 1_000_000,
+        "truck": 2_000,
+        "queries": 10_000,
+    },
+}
+
+
+class Fixture:
+    """
+    The generated inputs the benchmarks run on, written to a temporary directory.
+
+    Attributes:
+        sizes (dict): The sizes of the inputs, from SCALES.
+        directory (str): The directory the files are written to.
+        city_fp (str): The binary distance file.
+        csv_fp (str | None): The same distances as a CSV adjacency matrix in the format of distances.csv, for the
+            CSV loader, or None for cities over _CSV_LIMIT nodes.
+        locations_fp (str): The locations table.
+        manifest_fp (str): The package manifest.
+    """
+
+    def __init__(self, sizes: dict, directory: str, seed: int) -> None:
+        self.sizes = sizes
+        self.directory = directory
+        self.city_fp = os.path.join(directory, "city.bin")
+        self.csv_fp = os.path.join(directory, "city.csv") if sizes["nodes"] <= _CSV_LIMIT else None
+        self.locations_fp = os.path.join(directory, "locations.csv")
+        self.manifest_fp = os.path.join(directory, "packages.csv")
+
+        write_city(self.city_fp, self.locations_fp, sizes["nodes"], seed, sizes["clusters"])
+        write_manifest(self.manifest_fp, sizes["packages"], sizes["nodes"], seed)
+
+        self.city = City(self.city_fp, self.locations_fp)
+        if self.csv_fp is not None:
+            with open(self.csv_fp, mode="w", encoding="utf-8") as file:
+                for node in self.city.nodes:
+                    distances = (self.city.distance_between(node, other) for other in range(node + 1))
+                    padding = "," * (len(self.city.nodes) - node - 1)  # the upper triangle is left empty
+                    file.write(",".join(f"{distance:.1f}" for distance in distances) + padding + "\n")
+
+        self.packages = Packages(self.manifest_fp, city=self.city)
+
+
+def _hash_table_set(fixture: Fixture) -> Callable[[], None]:
+    keys = list(range(fixture.sizes["operations"]))
+    random.Random(0).shuffle(keys)
+
+    def run() -> None:
+        table = HashTable()
+        for key in keys:
+            table._set(key, key)
+
+    return run
+
+
+def _hash_table_get(fixture: Fixture) -> Callable[[], None]:
+    keys = list(range(fixture.sizes["operations"]))
+    table = HashTable()
+    for key in keys:
+        table._set(key, key)
+    random.Random(0).shuffle(keys)
+
+    def run() -> None:
+        get = table._get
+        for key in keys:
+            get(key)
+
+    return run
+
+
+def _packages_load(fixture: Fixture) -> Callable[[], None]:
+    return lambda: Packages(fixture.manifest_fp, city=fixture.city)
+
+
+def _city_load_csv(fixture: Fixture) -> Callable[[], None] | None:
+    if fixture.csv_fp is None:
+        return None
+    return lambda: City(fixture.csv_fp, fixture.locations_fp)
+
+
+def _city_load_binary(fixture: Fixture) -> Callable[[], None]:
+    return lambda: City(fixture.city_fp, fixture.locations_fp)
+
+
+def _truck_packages(fixture: Fixture) -> list:
+    count = fixture.sizes["truck"]
+    return [pkg for pkg in fixture.packages.values() if pkg.earliest_availability == 0.0][:count]
+
+
+def _find_route(fixture: Fixture) -> Callable[[], None]:
+    truck = Truck(1, _truck_packages(fixture), fixture.city, 480.0)
+    return truck.find_route
+
+
+def _status_at_time(fixture: Fixture) -> Callable[[], None]:
+    truck = Truck(1, _truck_packages(fixture), fixture.city, 480.0)
+    end = truck.events().times[-1]
+    rng = random.Random(0)
+    times = [rng.uniform(480.0, end) for _ in range(fixture.sizes["queries"])]
+
+    def run() -> None:
+        truck.route = truck.route  # drops the cached event log, so the first query simulates the day again
+        for query in times:
+            truck.status_at_time(query)
+
+    return run
+
+
+# Every benchmark takes the fixture and returns the function to time (or None if it does not apply at this scale),
+# so that setup is not timed.
+BENCHMARKS: dict[str, Callable[[Fixture], Callable[[], None] | None]] = {
+    "hash_table_set": _hash_table_set,
+    "hash_table_get": _hash_table_get,
+    "packages_load": _packages_load,
+    "city_load_csv": _city_load_csv,
+    "city_load_binary": _city_load_binary,
+    "truck_find_route": _find_route,
+    "truck_status_at_time": _status_at_time,
+}
+
+
+def run_benchmarks(scale: str = "small", repeat: int = 3, seed: int = 0, only: list | None = None) -> dict:
+    """
+    Generates the inputs for a scale and times every benchmark on them.
+
+    Args:
+        scale (str, optional): One of the keys of SCALES.
+        repeat (int, optional): How many times each benchmark is run; the fastest run is reported.
+        seed (int, optional): The seed of the generated inputs.
+        only (list, optional): The names of the benchmarks to run. Defaults to all of them.
+
+    Returns:
+        dict: The fastest time of every benchmark in seconds, keyed by name.
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Fixture(SCALES[scale], directory, seed)
+        for name, setup in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            run = setup(fixture)
+            if run is None:
+                continue
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - started)
+            results[name] = best
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float, min_delta: float = 0.005) -> list[str]:
+    """
+    Returns a message for every benchmark that is more than tolerance (0.25 means 25%) slower than its baseline.
+    Slowdowns under min_delta seconds are ignored, since very short benchmarks are dominated by timer noise.
+    """
+
+    regressions = []
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline is not None and max(baseline * (1 + tolerance), baseline + min_delta) < seconds:
+            regressions.append(f"{name}: {seconds:.4f}s, baseline {baseline:.4f}s ({seconds / baseline - 1:+.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the core data structures and algorithms on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baselines")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale, args.repeat, args.seed, args.only)
+    for name, seconds in results.items():
+        print(f"{name:24} {seconds:10.4f}s")
+
+    baselines = {}
+    if os.path.exists(BASELINES_FP):
+        with open(BASELINES_FP, encoding="utf-8") as file:
+            baselines = json.load(file)
+
+    if args.save:
+        baselines[args.scale] = {**baselines.get(args.scale, {}), **results}
+        with open(BASELINES_FP, mode="w", encoding="utf-8") as file:
+            json.dump(baselines, file, indent=4, sort_keys=True)
+            file.write("\n")
+        print(f"Saved baselines for {args.scale} to {BASELINES_FP}.")
+        sys.exit(0)
+
+    regressions = compare(results, baselines.get(args.scale, {}), args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    if args.scale not in baselines:
+        print(f"\nNo baselines stored for {args.scale}; run with --save to store them.")
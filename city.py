@@ -1,59 +1,190 @@
 import csv
+import heapq
+import mmap
 import operator
+import struct
+import sys
+from array import array
 from datetime import datetime, timedelta
-from itertools import accumulate
+from itertools import accumulate, chain
+from math import inf
 from typing import Iterable
 
+from custom_types import VehicleProfile
 from packages import Packages
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the route metrics fall back to plain Python without it.
+    np = None
+
+# Binary distance files start with this header: magic bytes, format version and node count. The header is
+# followed by the lower triangle of the matrix (diagonal included) as little-endian float32, one row after another.
+_BINARY_MAGIC = b"DMAT"
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sIQ")
+
+# The profile used for arrival times when a truck does not have its own.
+_DEFAULT_PROFILE = VehicleProfile()
+
 
 class City:
     """
     Represents a city with nodes and an adjacency matrix.
 
     Attributes:
+        adj_mat_fp (str | None): The file path the adjacency matrix was loaded from, or None for a city built with
+            from_matrix.
+        is_binary (bool): Whether that file is a binary distance file.
+        is_symmetric (bool): Whether the distance from a to b is always the distance from b to a. Only a city
+            built with from_matrix can be asymmetric.
         nodes (list): A list of node indices.
-        adjacency_matrix (list): A 2D list representing the adjacency matrix.
+        adjacency_matrix (list | None): A 2D list representing the adjacency matrix, or None for a city loaded
+            from a binary distance file.
+        matrix (numpy.ndarray | None): The adjacency matrix as a NumPy array, or None if NumPy is not used or the
+            city was loaded from a binary distance file.
 
     Methods:
-        __init__(self, adj_mat_fp: str) -> None:
-            Initializes the graph given an adjacency matrix file path.
+        __init__(self, adj_mat_fp: str, locations_fp: str | None = None) -> None:
+            Initializes the graph given an adjacency matrix file path and an optional locations file path.
         __iter__(self) -> Iterable:
             Returns an iterator for the adjacency matrix.
         __getitem__(self, key) -> list:
             Returns the adjacency matrix for a given node index.
+        from_matrix(rows: list, addresses: list | None = None) -> City:
+            Builds a city from a square matrix held in memory, which may be asymmetric.
         _load(self, filename: str) -> None:
             Loads the adjacency matrix from a file.
+        _load_binary(self, filename: str) -> None:
+            Memory-maps the packed lower triangle of the adjacency matrix from a binary distance file.
+        convert_csv_to_binary(csv_fp: str, bin_fp: str) -> int:
+            Converts a CSV adjacency matrix into the binary distance format.
+        write_binary(bin_fp: str, rows: Iterable) -> int:
+            Writes a binary distance file from the rows of the lower triangle of a matrix.
+        _load_locations(self, filename: str) -> None:
+            Loads the address of every node from a file.
         __str__(self) -> str:
             Returns a string representation of the adjacency matrix.
         address_to_node(self, address: str) -> int:
             Converts an address to its corresponding node index.
         node_to_address(self, node: int) -> str:
             Converts a node number to its corresponding address.
+        nearest_nodes(self, node: int, k: int) -> list:
+            Returns the k nearest other nodes of a node from its cached neighbor list.
+        neighbor_lists(self, nodes: Iterable, k: int) -> dict[int, list]:
+            Returns the k nearest neighbors of every node among a set of nodes.
+        route_lengths(self, routes: list) -> list:
+            Returns the length of every route in a batch of candidate routes.
     """
 
-    def __init__(self, adj_mat_fp: str) -> None:
+    def __init__(
+        self, adj_mat_fp: str, locations_fp: str | None = None, use_numpy: bool = True
+    ) -> None:
         """
         Initializes the graph given a adjacency matrix file path.
 
         Args:
-            adj_mat_fp (str): The file path of the adjacency matrix.
+            adj_mat_fp (str): The file path of the adjacency matrix. Either a CSV holding the lower triangle of the
+                matrix, or a binary distance file written by convert_csv_to_binary, which is memory-mapped instead
+                of read.
+            locations_fp (str, optional): The file path of the locations table, which lists the node index and
+                address of every node. Addresses cannot be looked up without it.
+            use_numpy (bool, optional): Whether to keep a NumPy copy of the matrix for the vectorized route
+                metrics. Ignored if NumPy is not installed.
         """
 
+        self._setup(adj_mat_fp, use_numpy)
+        with open(adj_mat_fp, "rb") as file:
+            self.is_binary = file.read(len(_BINARY_MAGIC)) == _BINARY_MAGIC
+        if self.is_binary:
+            self._load_binary(adj_mat_fp)
+        else:
+            self._load(adj_mat_fp)
+        if locations_fp is not None:
+            self._load_locations(locations_fp)
+
+        self.matrix = None
+        if self._use_numpy and self.adjacency_matrix is not None:
+            self.matrix = np.array(self.adjacency_matrix, dtype=np.float64)
+
+    def _setup(self, adj_mat_fp: str | None, use_numpy: bool) -> None:
         self.nodes = []
         self.adjacency_matrix = []
-        self._load(adj_mat_fp)
+        self._address_index: dict[str, int] = {}
+        self._node_addresses: list[str] = []
+        self._use_numpy: bool = use_numpy and np is not None
+
+        # The packed lower triangle of a binary distance file, and a NumPy view of the same memory.
+        self._packed: memoryview | array | None = None
+        self._packed_array = None
 
-        pass
+        self.adj_mat_fp = adj_mat_fp
+        self.is_binary: bool = False
+        self.is_symmetric: bool = True
+
+        # The nearest nodes of every node computed so far, and whether each list holds every node within the cutoff.
+        self._neighbors: dict[int, tuple[list, bool]] = {}
+        self.neighbor_cutoff: float | None = None
+
+    @classmethod
+    def from_matrix(cls, rows: list, addresses: list | None = None, use_numpy: bool = True) -> "City":
+        """
+        Builds a city from a full square matrix held in memory rather than loaded from a file.
+
+        Unlike the files, the matrix does not have to be symmetric: row a holds the distances from node a, so
+        shortest paths over one-way streets can be used as they are. Route lengths, arrival times and deadline
+        checks follow the direction of travel; local search still scores its moves as if the distances were
+        symmetric.
+
+        Args:
+            rows (list): One row of distances per node.
+            addresses (list, optional): The address of every node, in node order.
+            use_numpy (bool, optional): Whether to keep a NumPy copy of the matrix for the vectorized route
+                metrics. Ignored if NumPy is not installed.
+
+        Returns:
+            City: The city, with adj_mat_fp set to None.
+
+        Raises:
+            ValueError: If the matrix is not square or there is not one address per node.
+        """
+
+        city = cls.__new__(cls)
+        city._setup(None, use_numpy)
+        city.adjacency_matrix = [[float(distance) for distance in row] for row in rows]
+        city.nodes = list(range(len(city.adjacency_matrix)))
+        for node, row in enumerate(city.adjacency_matrix):
+            if len(row) != len(city.nodes):
+                raise ValueError(f"Row {node} holds {len(row)} distances instead of {len(city.nodes)}.")
+        city.is_symmetric = all(
+            row[other] == city.adjacency_matrix[other][node]
+            for node, row in enumerate(city.adjacency_matrix)
+            for other in range(node)
+        )
+
+        if addresses is not None:
+            if len(addresses) != len(city.nodes):
+                raise ValueError(f"{len(addresses)} addresses were given for {len(city.nodes)} nodes.")
+            city._node_addresses = list(addresses)
+            city._address_index = {address: node for node, address in enumerate(addresses)}
+
+        city.matrix = None
+        if city._use_numpy:
+            city.matrix = np.array(city.adjacency_matrix, dtype=np.float64).reshape(len(city.nodes), len(city.nodes))
+        return city
 
     def __iter__(self) -> Iterable:
-        return iter(self.adjacency_matrix)
+        if self.adjacency_matrix is not None:
+            return iter(self.adjacency_matrix)
+        return (self[node] for node in self.nodes)
 
     def __getitem__(self, key) -> list:
-        if key not in self.nodes:
+        if not 0 <= key < len(self.nodes):
             raise KeyError(key)
-        else:
+        elif self.adjacency_matrix is not None:
             return self.adjacency_matrix[key]
+        else:
+            return [self.distance_between(key, node) for node in self.nodes]
 
     def _load(self, filename: str) -> None:
         """
@@ -66,25 +197,132 @@ class City:
         with open(file=filename, mode="r", newline="", encoding="utf-8-sig") as file:
             csv_reader = csv.reader(file, delimiter=",")
 
+            rows = []
             for current_row_index, row in enumerate(csv_reader):
                 self.nodes.append(current_row_index)
-                current_row_index += 1
-                self.adjacency_matrix.append(
-                    [float(_) if _ != "" else 0.0 for _ in row]
-                )
+                rows.append([float(_) if _ != "" else 0.0 for _ in row])
+
+        # The file only holds the lower triangle, so the upper part of each row is read down the matching column.
+        columns = list(zip(*rows))
+        self.adjacency_matrix = [
+            rows[i][:i] + list(columns[i][i:]) for i in range(len(self.nodes))
+        ]
+
+    def _load_binary(self, filename: str) -> None:
+        """
+        Memory-maps the packed lower triangle of the adjacency matrix from a binary distance file.
 
-        for i in range(len(self.nodes)):
-            for j in range(i, len(self.adjacency_matrix[i])):
-                self.adjacency_matrix[i][j] = self.adjacency_matrix[j][i]
+        Nothing but the header is read up front; the operating system pages distances in as they are used, and
+        every process that maps the same file shares one copy of it.
+
+        Args:
+            filename (str): The file path of the binary distance file.
+
+        Raises:
+            ValueError: If the file is not a binary distance file of a supported version.
+        """
+
+        with open(filename, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, node_count = _BINARY_HEADER.unpack_from(buffer)
+        entries = node_count * (node_count + 1) // 2
+        if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+            raise ValueError(f"{filename} is not a version {_BINARY_VERSION} distance file.")
+        if len(buffer) != _BINARY_HEADER.size + entries * 4:
+            raise ValueError(f"{filename} is truncated.")
+
+        self.nodes = list(range(node_count))
+        self.adjacency_matrix = None
+        data = memoryview(buffer)[_BINARY_HEADER.size :]
+        if sys.byteorder == "little":
+            self._packed = data.cast("f")
+        else:
+            self._packed = array("f", data)
+            self._packed.byteswap()
+        if self._use_numpy:
+            self._packed_array = np.frombuffer(
+                buffer, dtype="<f4", count=entries, offset=_BINARY_HEADER.size
+            )
+
+    @staticmethod
+    def convert_csv_to_binary(csv_fp: str, bin_fp: str) -> int:
+        """
+        Converts a CSV adjacency matrix into the binary distance format read by _load_binary.
+
+        The CSV is streamed one row at a time and only its lower triangle is kept, so the full square matrix is
+        never held in memory. Distances are stored as float32.
+
+        Args:
+            csv_fp (str): The file path of the CSV adjacency matrix.
+            bin_fp (str): The file path of the binary distance file to write.
+
+        Returns:
+            int: The number of nodes written.
+        """
+
+        with open(file=csv_fp, mode="r", newline="", encoding="utf-8-sig") as source:
+            rows = (
+                [float(_) if _ != "" else 0.0 for _ in row[: i + 1]]
+                for i, row in enumerate(csv.reader(source, delimiter=","))
+            )
+            return City.write_binary(bin_fp, rows)
+
+    @staticmethod
+    def write_binary(bin_fp: str, rows: Iterable) -> int:
+        """
+        Writes a binary distance file from the rows of the lower triangle of a matrix.
+
+        Args:
+            bin_fp (str): The file path of the binary distance file to write.
+            rows (Iterable): One row per node, in order. Row i holds the distances from node i to nodes 0 through i.
+
+        Returns:
+            int: The number of nodes written.
+        """
+
+        node_count = 0
+        with open(bin_fp, "wb") as target:
+            target.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0))
+            for row in rows:
+                lower = array("f", row)
+                if len(lower) != node_count + 1:
+                    raise ValueError(f"Row {node_count} holds {len(lower)} distances instead of {node_count + 1}.")
+                if sys.byteorder != "little":
+                    lower.byteswap()
+                lower.tofile(target)
+                node_count += 1
+
+            target.seek(0)
+            target.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, node_count))
+
+        return node_count
+
+    def _load_locations(self, filename: str) -> None:
+        """
+        Loads the locations table from a file and builds the address and node indexes once.
+
+        Each row holds a node index followed by the address of that node.
+
+        Args:
+            filename (str): The file path of the locations table.
+        """
+
+        with open(file=filename, mode="r", newline="", encoding="utf-8-sig") as file:
+            csv_reader = csv.reader(file, delimiter=",")
+            self._node_addresses = [""] * len(self.nodes)
+            for row in csv_reader:
+                node, address = int(row[0]), row[1]
+                if not 0 <= node < len(self.nodes):
+                    raise KeyError(node)
+                self._node_addresses[node] = address
+                self._address_index[address] = node
 
     def __str__(self) -> str:
-        return "\n".join([str(_) for _ in self.adjacency_matrix])
+        return "\n".join([str(_) for _ in self])
 
-    def _convert_miles_to_minutes(self, miles: float) -> float:
-        # Would require a rework if the MPH of a truck could change.
-        MPH = 18.0
-        MINUTES = 60.0
-        return miles / MPH * MINUTES
+    def _convert_miles_to_minutes(self, miles: float, profile: VehicleProfile | None = None) -> float:
+        return (profile or _DEFAULT_PROFILE).minutes(miles)
 
     def address_to_node(self, address: str) -> int:
         """
@@ -97,43 +335,10 @@ class City:
             int: The node index corresponding to the address.
 
         Raises:
-            KeyError: If the address is not found in the locations dictionary.
-        """
-
-        locations = {
-            "4001 South 700 East": 0,
-            "1060 Dalton Ave S": 1,
-            "1330 2100 S": 2,
-            "1488 4800 S": 3,
-            "177 W Price Ave": 4,
-            "195 W Oakland Ave": 5,
-            "2010 W 500 S": 6,
-            "2300 Parkway Blvd": 7,
-            "233 Canyon Rd": 8,
-            "2530 S 500 E": 9,
-            "2600 Taylorsville Blvd": 10,
-            "2835 Main St": 11,
-            "300 State St": 12,
-            "3060 Lester St": 13,
-            "3148 S 1100 W": 14,
-            "3365 S 900 W": 15,
-            "3575 W Valley Central Station bus Loop": 16,
-            "3595 Main St": 17,
-            "380 W 2880 S": 18,
-            "410 S State St": 19,
-            "4300 S 1300 E": 20,
-            "4580 S 2300 E": 21,
-            "5025 State St": 22,
-            "5100 South 2700 West": 23,
-            "5383 S 900 East #104": 24,
-            "600 E 900 South": 25,
-            "6351 South 900 East": 26,
-        }
-
-        if address not in locations:
-            raise KeyError(address)
-
-        return locations[address]
+            KeyError: If the address is not found in the locations table.
+        """
+
+        return self._address_index[address]
 
     def node_to_address(self, node: int) -> str:
         """
@@ -146,48 +351,124 @@ class City:
             str: The address corresponding to the given node number.
 
         Raises:
-            KeyError: If the address is not found in the locations dictionary.
-        """
-
-        locations = {
-            0: "4001 South 700 East",
-            1: "1060 Dalton Ave S",
-            2: "1330 2100 S",
-            3: "1488 4800 S",
-            4: "177 W Price Ave",
-            5: "195 W Oakland Ave",
-            6: "2010 W 500 S",
-            7: "2300 Parkway Blvd",
-            8: "233 Canyon Rd",
-            9: "2530 S 500 E",
-            10: "2600 Taylorsville Blvd",
-            11: "2835 Main St",
-            12: "300 State St",
-            13: "3060 Lester St",
-            14: "3148 S 1100 W",
-            15: "3365 S 900 W",
-            16: "3575 W Valley Central Station bus Loop",
-            17: "3595 Main St",
-            18: "380 W 2880 S",
-            19: "410 S State St",
-            20: "4300 S 1300 E",
-            21: "4580 S 2300 E",
-            22: "5025 State St",
-            23: "5100 South 2700 West",
-            24: "5383 S 900 East #104",
-            25: "600 E 900 South",
-            26: "6351 South 900 East",
-        }
-
-        if node not in locations:
+            KeyError: If the node is not found in the locations table.
+        """
+
+        if not 0 <= node < len(self._node_addresses):
             raise KeyError(node)
 
-        return locations[node]
+        return self._node_addresses[node]
 
     def distance_between(self, a: int, b: int) -> float:
+        if self._packed is not None:
+            if a < b:
+                a, b = b, a
+            return self._packed[a * (a + 1) // 2 + b]
         return self.adjacency_matrix[a][b]
 
+    def _gather(self, a, b):
+        """
+        Returns the distances between the node arrays a and b, element by element, as a NumPy array.
+        """
+
+        if self.matrix is not None:
+            return self.matrix[a, b]
+        row = np.maximum(a, b)
+        return self._packed_array[row * (row + 1) // 2 + np.minimum(a, b)].astype(np.float64)
+
+    def _legs(self, route: list):
+        """
+        Returns the length of every leg of the route as a NumPy array, gathered from the matrix in one step.
+        """
+
+        stops = np.asarray(route, dtype=np.intp)
+        return self._gather(stops[:-1], stops[1:])
+
+    @property
+    def uses_numpy(self) -> bool:
+        """
+        Whether distances are gathered with NumPy, which makes computing a node's neighbor list a partial sort
+        instead of a scan in Python.
+        """
+
+        return self._use_numpy
+
+    def build_neighbor_lists(self, k: int, cutoff: float | None = None, nodes: Iterable | None = None) -> None:
+        """
+        Precomputes the k nearest neighbors of every node, for nearest_nodes.
+
+        Args:
+            k (int): The length of each neighbor list.
+            cutoff (float, optional): The granular cutoff in miles. Nodes farther away are never listed, so lists
+                in sparse areas may be shorter than k. Replaces the cutoff of the lists computed so far.
+            nodes (Iterable, optional): The nodes to compute lists for. Defaults to all of them; the others are
+                computed when first asked for.
+        """
+
+        self.neighbor_cutoff = cutoff
+        self._neighbors = {}
+        for node in self.nodes if nodes is None else nodes:
+            self.nearest_nodes(node, k)
+
+    def nearest_nodes(self, node: int, k: int) -> list:
+        """
+        Returns up to k other nodes nearest to node, nearest first, within neighbor_cutoff if one is set.
+
+        Lists are computed once per node with a partial sort of the node's row and cached; asking for a longer list
+        than the cached one computes it again.
+        """
+
+        near, complete = self._neighbors.get(node, (None, False))
+        if near is None or (len(near) < k and not complete):
+            near = self._k_nearest(node, self.nodes, k)
+            complete = len(near) < k
+            self._neighbors[node] = (near, complete)
+        return near[:k]
+
+    def neighbor_lists(self, nodes: Iterable, k: int) -> dict[int, list]:
+        """
+        Returns, for every node in nodes, the up to k other nodes in nodes nearest to it, nearest first and within
+        neighbor_cutoff if one is set. Used for candidate lists restricted to one route. Not cached.
+        """
+
+        distinct = list(dict.fromkeys(nodes))
+        return {node: self._k_nearest(node, distinct, k) for node in distinct}
+
+    def _k_nearest(self, node: int, candidates: list, k: int) -> list:
+        """
+        Returns the k candidates other than node nearest to it, nearest first and ties by node index, without
+        sorting the whole row: NumPy partitions it around the kth distance, and plain Python keeps a heap of k.
+        """
+
+        cutoff = inf if self.neighbor_cutoff is None else self.neighbor_cutoff
+        if k <= 0:
+            return []
+
+        if self._use_numpy:
+            others = np.asarray(candidates, dtype=np.intp)
+            distances = self._gather(np.full(len(others), node, dtype=np.intp), others)
+            keep = (others != node) & (distances <= cutoff)
+            others, distances = others[keep], distances[keep]
+            if k < len(others):
+                nearest = np.argpartition(distances, k - 1)[:k]
+                others, distances = others[nearest], distances[nearest]
+            order = np.lexsort((others, distances))
+            return others[order].tolist()
+
+        d = self.distance_between
+        near = heapq.nsmallest(
+            k,
+            ((distance, other) for other in candidates if other != node and (distance := d(node, other)) <= cutoff),
+        )
+        return [other for _, other in near]
+
     def route_length(self, route: list) -> float:
+        if self._use_numpy:
+            if len(route) < 2:
+                return 0.0
+            # cumsum adds the legs in order, so the total matches the plain Python sum exactly.
+            return float(np.cumsum(self._legs(route))[-1])
+
         total_length = 0.0
         for i in range(len(route) - 1):
             a = route[i]
@@ -196,7 +477,47 @@ class City:
             total_length += distance
         return total_length
 
+    def route_lengths(self, routes: list) -> list:
+        """
+        Returns the length of every route in a batch of candidate routes.
+
+        With NumPy, the routes are padded to a common length and all of their legs are gathered from the matrix in
+        a single call, so scoring thousands of candidates does not loop over legs in Python.
+
+        Args:
+            routes (list): A list of routes, each a list of node indexes. The routes may differ in length.
+
+        Returns:
+            list: The length of each route, in the same order as routes.
+        """
+
+        if not self._use_numpy:
+            return [self.route_length(route) for route in routes]
+        if not routes:
+            return []
+
+        lengths = np.array([len(route) for route in routes], dtype=np.intp)
+        longest = int(lengths.max())
+        if longest < 2:
+            return [0.0] * len(routes)
+
+        # Scatter every stop into a rectangle, padding each route with its own last stop.
+        stops = np.fromiter(chain.from_iterable(routes), dtype=np.intp, count=int(lengths.sum()))
+        ends = np.cumsum(lengths)
+        last_stops = np.where(0 < lengths, stops[np.maximum(ends - 1, 0)], 0)
+        padded = np.repeat(last_stops[:, None], longest, axis=1)
+        rows = np.repeat(np.arange(len(routes)), lengths)
+        columns = np.arange(len(stops)) - np.repeat(ends - lengths, lengths)
+        padded[rows, columns] = stops
+
+        legs = self._gather(padded[:, :-1], padded[:, 1:])
+        legs[np.arange(1, longest) >= lengths[:, None]] = 0.0  # drop the padding legs
+        return np.cumsum(legs, axis=1)[:, -1].tolist()
+
     def distances(self, route: list) -> list:
+        if self._use_numpy:
+            return self._legs(route).tolist() if 1 < len(route) else []
+
         distances = []
         for i in range(1, len(route)):
             a = route[i - 1]
@@ -206,45 +527,110 @@ class City:
         return distances
 
     def cumulative_distances(self, route: list) -> list:
+        if self._use_numpy:
+            return np.cumsum(self._legs(route)).tolist() if 1 < len(route) else []
+
         return list(accumulate(self.distances(route), operator.add))
 
-    def time_at_each_stop(self, route: list, time_offset: float = 480.0) -> list:
+    def time_at_each_stop(
+        self, route: list, time_offset: float = 480.0, profile: VehicleProfile | None = None
+    ) -> list:
+        """
+        Returns the arrival time at every stop after the first, in minutes since the start of the day.
+
+        The truck drives at the profile's speed and spends its service time at every stop before driving on, so
+        the arrival at the (i + 1)th stop is time_offset + the driving time to it + i service times.
+        """
+
+        profile = profile or _DEFAULT_PROFILE
+        service = profile.service_minutes
+        if self._use_numpy:
+            if len(route) < 2:
+                return []
+            minutes = profile.minutes(np.cumsum(self._legs(route))) + time_offset
+            if service:
+                minutes += service * np.arange(len(route) - 1)
+            return minutes.tolist()
+
         times = [
-            self._convert_miles_to_minutes(_) + time_offset
-            for _ in self.cumulative_distances(route)
+            profile.minutes(_) + service * i + time_offset
+            for i, _ in enumerate(self.cumulative_distances(route))
         ]
         return times
 
     def cumulative_times(
-        self, route: list, start_time: datetime.time, speed: float = 18.0
+        self, route: list, start_time: datetime.time, profile: VehicleProfile | None = None
     ) -> list:
+        profile = profile or _DEFAULT_PROFILE
         now = datetime.now()
         start_datetime = datetime.combine(now.date(), start_time)
         distances = self.distances(route)
 
         time_for_each_leg = [
-            timedelta(hours=distance / speed) for distance in distances
+            timedelta(minutes=profile.minutes(distance)) for distance in distances
         ]
 
         cumulative_times = [start_datetime]
-        for time in time_for_each_leg:
+        for i, time in enumerate(time_for_each_leg):
             new_time = cumulative_times[-1] + time
+            if i:
+                new_time += timedelta(minutes=profile.service_minutes)
             cumulative_times.append(new_time)
 
         return [time.time() for time in cumulative_times]
 
-    def route_is_on_time(
-        self, route: list, packages: Packages, time_offset: float = 480.0
+    @staticmethod
+    def deadlines_by_node(packages) -> dict:
+        """
+        Returns the earliest deadline of the packages for every node they are delivered to.
+        """
+
+        due = {}
+        for package in packages:
+            if package.deadline < due.get(package.node, inf):
+                due[package.node] = package.deadline
+        return due
+
+    def route_meets_deadlines(
+        self, route: list, due: dict, time_offset: float = 480.0, profile: VehicleProfile | None = None
     ) -> bool:
-        times = self.time_at_each_stop(route, time_offset)
-        for i in range(len(route) - 1):
-            current_stop = route[i]
-            for package in packages:
-                current_package_address = package["address"]
-                current_package_node = self.address_to_node(current_package_address)
-
-                if current_package_node == current_stop:
-                    current_package_deadline = package["deadline"]
-                    if current_package_deadline < times[i]:
-                        return False
+        """
+        Checks that the route reaches every node in due by its deadline, when driven starting at time_offset.
+
+        Packages are delivered the first time the route reaches their node. The check is linear in the length of the
+        route.
+
+        Args:
+            route (list): The route, as a list of node indexes.
+            due (dict): The deadline of every node, as returned by deadlines_by_node.
+            time_offset (float, optional): The time the route starts, in minutes since the start of the day.
+            profile (VehicleProfile, optional): The speed and service time of the truck driving the route.
+
+        Returns:
+            bool: True if no deadline is missed.
+        """
+
+        if not route:
+            return True
+        if due.get(route[0], inf) < time_offset:
+            return False
+
+        reached = {route[0]}
+        # times[i] is the arrival time at route[i + 1].
+        times = self.time_at_each_stop(route, time_offset, profile)
+        for node, time in zip(route[1:], times):
+            if node in reached:
+                continue
+            reached.add(node)
+            if due.get(node, inf) < time:
+                return False
         return True
+
+    def route_is_on_time(
+        self,
+        route: list,
+        packages: Packages,
+        time_offset: float = 480.0,
+        profile: VehicleProfile | None = None,
+    ) -> bool:
+        return self.route_meets_deadlines(route, self.deadlines_by_node(packages), time_offset, profile)
@@ -1,4 +1,13 @@
-from typing import Any, NamedTuple, List
+from math import inf
+from typing import Any, NamedTuple, List, Tuple
+
+
+class Event(NamedTuple):
+    time: float
+    truck_id: int
+    node: int
+    miles: float
+    package_ids: Tuple[int, ...]
 
 
 class KeyValuePair(NamedTuple):
@@ -6,5 +15,51 @@ class KeyValuePair(NamedTuple):
     value: Any
 
 
-Bucket = List[KeyValuePair]
-HashTableStructure = List[Bucket]
+class MalformedRow(NamedTuple):
+    line_number: int
+    row: List[str]
+    reason: str
+
+
+class PackageStatus(NamedTuple):
+    package: Any
+    truck: Any
+    load_time: float
+    delivery_time: float | None
+
+
+class RouteImprovement(NamedTuple):
+    route: List[int]
+    miles_saved: float
+    moves: int
+
+
+class Tour(NamedTuple):
+    route: List[int]
+    length: float
+
+
+class TruckLoad(NamedTuple):
+    truck_id: int
+    departure: float
+    package_ids: List[int]
+    route: List[int]
+    on_time: bool = True
+
+
+class VehicleProfile(NamedTuple):
+    """
+    What a truck can carry and how fast it delivers. The defaults are the trucks the program was written for:
+    18 miles per hour, no limits on packages or weight, and no time spent at a stop.
+    """
+
+    speed: float = 18.0  # miles per hour
+    max_packages: float = inf
+    max_weight: float = inf  # kilograms
+    service_minutes: float = 0.0  # spent at every stop between leaving the depot and returning
+
+    def minutes(self, miles: float) -> float:
+        return miles / self.speed * 60.0
+
+
+Slots = List[Any]
@@ -0,0 +1,73 @@
+from typing import Any, Hashable, Iterable
+
+
+class DisjointSet:
+    """
+    A union-find structure over hashable items.
+
+    Sets are joined by size and find halves the path it walks, so any sequence of n unions and finds runs in
+    O(n α(n)), which is linear for every practical n. Items are added the first time they are seen.
+
+    Attributes:
+        _parents (dict): The parent of every item; a set's root is its own parent.
+        _sizes (dict): The number of items under every root.
+    """
+
+    def __init__(self, items: Iterable[Hashable] = ()) -> None:
+        self._parents: dict[Any, Any] = {}
+        self._sizes: dict[Any, int] = {}
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._parents
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def add(self, item: Hashable) -> None:
+        """
+        Adds item as a set of its own, unless it is already in the structure.
+        """
+
+        if item not in self._parents:
+            self._parents[item] = item
+            self._sizes[item] = 1
+
+    def find(self, item: Hashable) -> Any:
+        """
+        Returns the root of the set containing item, adding item first if it is new.
+        """
+
+        parents = self._parents
+        if item not in parents:
+            self.add(item)
+            return item
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def union(self, a: Hashable, b: Hashable) -> Any:
+        """
+        Joins the sets containing a and b and returns the root of the joined set.
+        """
+
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self._sizes[a] < self._sizes[b]:
+            a, b = b, a
+        self._parents[b] = a
+        self._sizes[a] += self._sizes.pop(b)
+        return a
+
+    def groups(self) -> dict[Any, list]:
+        """
+        Returns the items of every set, in the order they were added, keyed by the root of the set.
+        """
+
+        groups: dict[Any, list] = {}
+        for item in self._parents:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
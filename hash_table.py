@@ -1,27 +1,53 @@
 from typing import Any, Iterator, List, Tuple
 
-from custom_types import Bucket, HashTableStructure, KeyValuePair
+from custom_types import KeyValuePair, Slots
+
+
+class _Marker:
+    """
+    A slot marker that keeps its identity when a table is copied or pickled.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def __reduce__(self) -> str:
+        return self.name
+
+
+# Markers for slots that have never been used and for slots whose entry was deleted.
+_EMPTY = _Marker("_EMPTY")
+_DELETED = _Marker("_DELETED")
 
 
 class HashTable:
     """
     A hash table implementation in Python.
 
+    Entries are stored with open addressing (linear probing) in two flat, parallel arrays of key and value slots.
+    When the table grows past its load factor a larger pair of arrays is allocated and the old entries are moved
+    over a few slots at a time by later writes, so no single insert pays for a full rehash.
+
     Attributes:
-        size (int): The size of the hash table.
-        _table (HashTableStructure): The underlying data structure for the hash table.
+        size (int): The number of slots in the hash table, always a power of two.
+        load_factor (float): The fraction of slots that may be in use before the table grows.
+        _keys (Slots): The key slots of the hash table.
+        _values (Slots): The value slots of the hash table, parallel to _keys.
 
     Methods:
-        __init__(self, size: int = 10) -> None: Initializes a new instance of the HashTable class.
-        __iter__(self) -> Iterator[Bucket]: Returns an iterator over the hash table.
+        __init__(self, size: int = 8, load_factor: float = 0.66) -> None: Initializes a new instance of the HashTable class.
+        __iter__(self) -> Iterator[KeyValuePair]: Returns an iterator over the entries in the hash table.
         __contains__(self, key: Any) -> bool: Checks if a key is present in the hash table.
-        __len__(self) -> int: Returns the number of elements in the hash table.
+        __len__(self) -> int: Returns the number of entries in the hash table.
         __getitem__(self, key: Any) -> Any: Retrieves the value associated with a key.
         __setitem__(self, key: Any, value: Any) -> None: Sets the value associated with a key.
         __delitem__(self, key: Any) -> None: Deletes the key-value pair from the hash table.
         __str__(self) -> str: Returns a string representation of the hash table.
         _hash(self, key: Any) -> int: Computes the hash value for a key.
-        _resize(self) -> None: Resizes the hash table when it reaches its load factor.
+        _resize(self) -> None: Starts moving the entries into a larger table when the load factor is reached.
         _get(self, key: Any, default: Any = None) -> Any: Retrieves the value associated with a key, with an optional default value.
         _set(self, key: Any, value: Any) -> None: Sets the value associated with a key.
         _del(self, key: Any) -> None: Deletes the key-value pair from the hash table.
@@ -30,28 +56,51 @@ class HashTable:
         zip(self) -> Iterator[Tuple[Any, Any]]: Returns an iterator over key-value pairs in the hash table.
     """
 
-    def __init__(self, size: int = 10) -> None:
+    # How many old slots are moved into the new table on every write while a rehash is in progress.
+    # Anything above 1 / load_factor finishes the move before the new table can fill up.
+    _MIGRATION_STEP: int = 8
+
+    DEFAULT_LOAD_FACTOR: float = 0.66
+
+    def __init__(self, size: int = 8, load_factor: float = DEFAULT_LOAD_FACTOR) -> None:
         """
         Initializes a new instance of the HashTable class.
 
         Args:
-            size (int): The size of the hash table.
+            size (int): The minimum number of slots in the hash table. It is rounded up to a power of two.
+            load_factor (float): The fraction of slots that may be in use before the table grows.
 
         Returns:
             None
         """
-        self.size: int = size
-        self._table: HashTableStructure = [[] for _ in range(self.size)]
-
-    def __iter__(self) -> Iterator[Bucket]:
+        if not 0.0 < load_factor < 1.0:
+            raise ValueError("load_factor must be between 0 and 1.")
+
+        capacity = 8
+        while capacity < size:
+            capacity *= 2
+
+        self.size: int = capacity
+        self.load_factor: float = load_factor
+        self._keys: Slots = [_EMPTY] * capacity
+        self._values: Slots = [None] * capacity
+        self._count: int = 0  # live entries, in both the current and the old table
+        self._used: int = 0  # slots of the current table that are not empty, including deleted ones
+
+        # The table being drained while a rehash is in progress, and how far the draining has got.
+        self._old_keys: Slots | None = None
+        self._old_values: Slots | None = None
+        self._migrated: int = 0
+
+    def __iter__(self) -> Iterator[KeyValuePair]:
         """
         Returns an iterator over the hash table.
 
         Yields:
-            Bucket: The next bucket in the hash table.
+            KeyValuePair: The next entry in the hash table.
         """
-        for entry in self._table:
-            yield entry
+        for key, value in self.zip():
+            yield KeyValuePair(key, value)
 
     def __contains__(self, key: Any) -> bool:
         """
@@ -63,12 +112,13 @@ class HashTable:
         Returns:
             bool: True if the key is found, False otherwise.
         """
-        index = self._hash(key)
-        bucket = self._table[index]
-        return any(pair.key == key for pair in bucket)
+        h = hash(key)
+        if self._find(self._keys, key, h) != -1:
+            return True
+        return self._old_keys is not None and self._find(self._old_keys, key, h) != -1
 
     def __len__(self) -> int:
-        return len(self._table)
+        return self._count
 
     def __getitem__(self, key: Any) -> Any:
         return self._get(key, default=None)
@@ -81,9 +131,7 @@ class HashTable:
 
     def __str__(self) -> str:
         result = "\n".join(
-            f"{pair.key}: {{{self._format_value(pair.value)}}}"
-            for bucket in self._table
-            for pair in bucket
+            f"{key}: {{{self._format_value(value)}}}" for key, value in self.zip()
         )
         return result
 
@@ -98,7 +146,7 @@ class HashTable:
         Returns:
             str: The formatted string representation of the value.
         """
-        if isinstance(value, HashTable):
+        if hasattr(value, "zip"):  # nested tables and package records
             nested_indent = indent + 4
             nested_result = "\n".join(
                 f"{' ' * nested_indent}{nested_key}: {{{self._format_value(nested_value, nested_indent)}}}"
@@ -110,7 +158,7 @@ class HashTable:
 
     def _hash(self, key: Any) -> int:
         """
-        Hashes the given key using the built-in hash function and returns the hash value modulo the size of the hash table.
+        Hashes the given key using the built-in hash function and returns the home slot of the key.
 
         Args:
             key (Any): The key to be hashed.
@@ -118,21 +166,126 @@ class HashTable:
         Returns:
             int: The hash value of the key modulo the size of the hash table.
         """
-        return hash(key) % self.size
+        return hash(key) & (self.size - 1)
+
+    def _find(self, keys: Slots, key: Any, h: int) -> int:
+        """
+        Probes the given key slots for a key.
+
+        Args:
+            keys (Slots): The key slots to search.
+            key (Any): The key to search for.
+            h (int): The full hash of the key.
+
+        Returns:
+            int: The index of the slot holding the key, or -1 if the key is not present.
+        """
+        mask = len(keys) - 1
+        index = h & mask
+        while True:
+            slot = keys[index]
+            if slot is _EMPTY:
+                return -1
+            if slot is not _DELETED and (slot is key or slot == key):
+                return index
+            index = (index + 1) & mask
+
+    def _insert(self, key: Any, value: Any, h: int) -> None:
+        """
+        Inserts or replaces a key in the current table without checking the load factor.
+
+        Args:
+            key (Any): The key to insert.
+            value (Any): The value to be associated with the key.
+            h (int): The full hash of the key.
+
+        Returns:
+            None
+        """
+        keys = self._keys
+        mask = self.size - 1
+        index = h & mask
+        tombstone = -1
+        while True:
+            slot = keys[index]
+            if slot is _EMPTY:
+                break
+            if slot is _DELETED:
+                if tombstone == -1:
+                    tombstone = index
+            elif slot is key or slot == key:
+                self._values[index] = value
+                return
+            index = (index + 1) & mask
+
+        if tombstone != -1:
+            index = tombstone
+        else:
+            self._used += 1
+        keys[index] = key
+        self._values[index] = value
+        self._count += 1
 
     def _resize(self) -> None:
         """
-        Resizes the hash table by doubling its size and rehashing all the elements.
-        This method is called when the load factor exceeds a certain threshold.
+        Allocates a new table and starts moving the existing entries into it.
+
+        The table doubles in size unless most of the used slots only hold deleted entries, in which case it is
+        rebuilt at the same size. The entries are moved by _migrate over the following writes. If the previous
+        rehash has not finished yet, every entry is rehashed into a single new table straight away instead.
 
         Returns:
             None
         """
-        self.size *= 2
-        new_table: List[List[Tuple[Any, Any]]] = [None] * self.size
-        for i in range(len(self._table)):
-            new_table[i] = self._table[i]
-        self._table = new_table
+        if self._old_keys is not None:
+            entries = list(self.zip())
+            while len(entries) * 2 > self.size * self.load_factor:
+                self.size *= 2
+            self._keys = [_EMPTY] * self.size
+            self._values = [None] * self.size
+            self._old_keys = None
+            self._old_values = None
+            self._count = 0
+            self._used = 0
+            for key, value in entries:
+                self._insert(key, value, hash(key))
+            return
+
+        if self._count * 2 >= self._used:
+            self.size *= 2
+
+        self._old_keys = self._keys
+        self._old_values = self._values
+        self._migrated = 0
+        self._keys = [_EMPTY] * self.size
+        self._values = [None] * self.size
+        self._used = 0
+
+    def _migrate(self, steps: int) -> None:
+        """
+        Moves up to the given number of slots from the old table into the current one.
+
+        Args:
+            steps (int): The number of old slots to visit.
+
+        Returns:
+            None
+        """
+        old_keys = self._old_keys
+        old_values = self._old_values
+        end = min(self._migrated + steps, len(old_keys))
+        for index in range(self._migrated, end):
+            key = old_keys[index]
+            if key is not _EMPTY and key is not _DELETED:
+                self._count -= 1  # _insert counts it again
+                self._insert(key, old_values[index], hash(key))
+                old_keys[index] = _DELETED
+                old_values[index] = None
+        self._migrated = end
+
+        if end == len(old_keys):
+            self._old_keys = None
+            self._old_values = None
 
     def _get(self, key: Any, default: Any = None) -> Any:
         """
@@ -145,13 +298,38 @@ class HashTable:
         Returns:
             Any: The value associated with the key if found, otherwise the default value.
         """
-        index = self._hash(key)
-        bucket = self._table[index]
-        for pair in bucket:
-            if pair.key == key:
-                return pair.value
+        h = hash(key)
+        index = self._find(self._keys, key, h)
+        if index != -1:
+            return self._values[index]
+        if self._old_keys is not None:
+            index = self._find(self._old_keys, key, h)
+            if index != -1:
+                return self._old_values[index]
         return default
 
+    def _probe_length(self, key: Any) -> int:
+        """
+        Returns the number of slots _get inspects to look up the given key, in both tables while a resize is in
+        progress. Used by the instrumentation; _get itself does not count.
+        """
+        h = hash(key)
+        probes = 0
+        for keys in (self._keys, self._old_keys):
+            if keys is None:
+                continue
+            mask = len(keys) - 1
+            index = h & mask
+            while True:
+                probes += 1
+                slot = keys[index]
+                if slot is _EMPTY:
+                    break
+                if slot is not _DELETED and (slot is key or slot == key):
+                    return probes
+                index = (index + 1) & mask
+        return probes
+
     def _set(self, key: Any, value: Any) -> None:
         """
         Sets the value associated with the given key in the hash table.
@@ -163,18 +341,27 @@ class HashTable:
         Returns:
             None
         """
-        index = self._hash(key)
-        bucket = self._table[index]
-        for i, pair in enumerate(bucket):
-            if pair.key == key:
-                bucket[i] = KeyValuePair(key, value)
-                return
-        bucket.append(KeyValuePair(key, value))
+        h = hash(key)
+        if self._old_keys is not None:
+            index = self._find(self._old_keys, key, h)
+            if index != -1:
+                self._old_keys[index] = _DELETED
+                self._old_values[index] = None
+                self._count -= 1
+            self._migrate(self._MIGRATION_STEP)
+
+        self._insert(key, value, h)
+
+        # Always leave at least one empty slot, so a probe for a missing key terminates.
+        if self._used >= min(self.size * self.load_factor, self.size - 1):
+            self._resize()
 
     def _del(self, key: Any) -> None:
         """
         Deletes the key-value pair with the given key from the hash table.
 
+        The slot is marked as deleted rather than emptied so that probes for other keys keep working.
+
         Args:
             key (Any): The key of the key-value pair to be deleted.
 
@@ -184,11 +371,17 @@ class HashTable:
         Returns:
             None
         """
-        index = self._hash(key)
-        bucket = self._table[index]
-        for i, pair in enumerate(bucket):
-            if pair.key == key:
-                del bucket[i]
+        h = hash(key)
+        for keys, values in ((self._keys, self._values), (self._old_keys, self._old_values)):
+            if keys is None:
+                continue
+            index = self._find(keys, key, h)
+            if index != -1:
+                keys[index] = _DELETED
+                values[index] = None
+                self._count -= 1
+                if self._old_keys is not None:
+                    self._migrate(self._MIGRATION_STEP)
                 return
         raise KeyError("Key not found.")
 
@@ -199,24 +392,19 @@ class HashTable:
         Returns:
             List[Any]: A list containing all the keys in the hash table.
         """
-        key_list = []
-        for bucket in self._table:
-            for item in bucket:
-                key_list.append(item[0])
-        return key_list
+        return [key for key, _ in self.zip()]
 
     def values(self) -> List[Any]:
         """
         Returns a list of all values stored in the hash table.
 
-        This method iterates over each bucket in the hash table and retrieves
-        the value of each entry. The values are then collected into a list and
-        returned.
+        This method walks the key slots of the hash table (and of the table being drained, if a rehash is in
+        progress) and collects the value of each live entry.
 
         Returns:
             A list of all values stored in the hash table.
         """
-        return [entry.value for bucket in self._table for entry in bucket]
+        return [value for _, value in self.zip()]
 
     def zip(self) -> Iterator[Tuple[Any, Any]]:
         """
@@ -225,4 +413,11 @@ class HashTable:
         Returns:
             An iterator that yields tuples of (key, value) pairs from the hash table.
         """
-        return zip(self.keys(), self.values())
+        tables = [(self._keys, self._values)]
+        if self._old_keys is not None:
+            tables.append((self._old_keys, self._old_values))
+
+        for keys, values in tables:
+            for index, key in enumerate(keys):
+                if key is not _EMPTY and key is not _DELETED:
+                    yield key, values[index]
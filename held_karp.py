@@ -0,0 +1,67 @@
+from array import array
+from math import inf
+
+from city import City
+from custom_types import Tour
+
+
+def held_karp(city: City, nodes, depot: int = 0) -> Tour:
+    """
+    Finds the shortest route that leaves the depot, visits every node once and returns to the depot.
+
+    This is the Held-Karp dynamic program over subsets of the nodes. Each subset is a bitmask, and the memo table
+    is a flat array holding, for every subset and last node, the length of the shortest path from the depot through
+    exactly that subset. Time grows as 2^n * n^2 and memory as 2^n * n, so it is only meant for small manifests
+    (up to about 15 nodes).
+
+    Args:
+        city (City): The city whose distances are used.
+        nodes (Iterable[int]): The nodes to visit. The depot is ignored if it is among them.
+        depot (int, optional): The node the route starts and ends at.
+
+    Returns:
+        Tour: The optimal route, starting and ending at the depot, and its length.
+    """
+
+    stops = [node for node in dict.fromkeys(nodes) if node != depot]
+    n = len(stops)
+    if n == 0:
+        return Tour([depot, depot], city.distance_between(depot, depot))
+
+    d = city.distance_between
+    legs = [[d(a, b) for b in stops] for a in stops]
+    full = (1 << n) - 1
+
+    # best[mask * n + last] is the shortest path from the depot through the stops in mask, ending at stops[last].
+    best = array("d", [inf]) * ((1 << n) * n)
+    previous = array("b", [-1]) * ((1 << n) * n)
+    for k in range(n):
+        best[(1 << k) * n + k] = d(depot, stops[k])
+
+    for mask in range(1, full + 1):
+        base = mask * n
+        for last in range(n):
+            length = best[base + last]
+            if length == inf:
+                continue
+            row = legs[last]
+            for k in range(n):
+                if mask >> k & 1:
+                    continue
+                index = (mask | 1 << k) * n + k
+                candidate = length + row[k]
+                if candidate < best[index]:
+                    best[index] = candidate
+                    previous[index] = last
+
+    base = full * n
+    last = min(range(n), key=lambda k: best[base + k] + d(stops[k], depot))
+    length = best[base + last] + d(stops[last], depot)
+
+    route = []
+    mask = full
+    while last != -1:
+        route.append(stops[last])
+        last, mask = previous[mask * n + last], mask & ~(1 << last)
+
+    return Tour([depot] + route[::-1] + [depot], length)
@@ -0,0 +1,229 @@
+import json
+import math
+import time
+from functools import wraps
+
+from city import City
+from hash_table import HashTable
+from truck import Truck
+
+# Instrumentation is off unless enable() is called. Nothing is wrapped while it is off, so the hot paths run the
+# original methods and pay nothing for it.
+_enabled = False
+_originals: dict = {}
+
+_counters: dict[str, int] = {}
+_histograms: dict[str, "Histogram"] = {}
+
+
+class Histogram:
+    """
+    A running summary of observed values, with counts in power-of-two buckets.
+
+    Attributes:
+        count (int): The number of values observed.
+        total (float): The sum of the values.
+        min (float): The smallest value, or inf if none was observed.
+        max (float): The largest value, or -inf if none was observed.
+        buckets (dict[float, int]): The number of values in each bucket, keyed by the bucket's upper bound (a power
+            of two); values up to 0 go in bucket 0.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets: dict[float, int] = {}
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        bound = 0.0 if value <= 0 else 2.0 ** math.ceil(math.log2(value))
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean(),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": {str(bound): count for bound, count in sorted(self.buckets.items())},
+        }
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Adds amount to the counter name.
+    """
+
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Adds a value to the histogram name.
+    """
+
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.observe(value)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable() -> None:
+    """
+    Starts recording. Wraps the instrumented methods:
+
+    - City.distance_between and City.address_to_node count their calls (and address lookups that fail).
+    - HashTable._get records the number of slots probed per lookup.
+    - Truck.find_route records its duration in milliseconds.
+    - Truck.status_at_time records its duration and the number of simulation steps (events) it reads.
+    """
+
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+
+    _wrap(City, "distance_between", _counted)
+    _wrap(City, "address_to_node", _counted_lookup)
+    _wrap(HashTable, "_get", _probed)
+    _wrap(Truck, "find_route", _timed)
+    _wrap(Truck, "status_at_time", _timed_status)
+
+
+def disable() -> None:
+    """
+    Stops recording and puts the original methods back. The recorded values are kept until reset().
+    """
+
+    global _enabled
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+    _enabled = False
+
+
+def reset() -> None:
+    """
+    Clears every counter and histogram.
+    """
+
+    _counters.clear()
+    _histograms.clear()
+
+
+def snapshot() -> dict:
+    """
+    Returns the recorded counters and histograms as plain data, ready to be dumped as JSON.
+    """
+
+    return {
+        "enabled": _enabled,
+        "counters": dict(sorted(_counters.items())),
+        "histograms": {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())},
+    }
+
+
+def dump(fname: str) -> None:
+    """
+    Writes snapshot() to fname as JSON.
+    """
+
+    with open(fname, mode="w", encoding="utf-8") as file:
+        json.dump(snapshot(), file, indent=4)
+        file.write("\n")
+
+
+def report() -> str:
+    """
+    Returns the recorded counters and histograms as a human readable table.
+    """
+
+    if not _enabled and not _counters and not _histograms:
+        return "Instrumentation is off."
+
+    lines = []
+    for name, value in sorted(_counters.items()):
+        lines.append(f"{name:40} {value:>12}")
+    for name, histogram in sorted(_histograms.items()):
+        lines.append(
+            f"{name:40} {histogram.count:>12}  mean {histogram.mean():.3f}  min {histogram.min:.3f}  "
+            f"max {histogram.max:.3f}"
+        )
+    return "\n".join(lines) if lines else "Nothing has been recorded yet."
+
+
+def _wrap(cls: type, name: str, make_wrapper) -> None:
+    original = getattr(cls, name)
+    _originals[(cls, name)] = original
+    setattr(cls, name, make_wrapper(original, f"{cls.__name__.lower()}.{name.lstrip('_')}"))
+
+
+def _counted(method, name: str):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        _counters[name] = _counters.get(name, 0) + 1
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+def _counted_lookup(method, name: str):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        count(name)
+        try:
+            return method(*args, **kwargs)
+        except KeyError:
+            count(f"{name}.misses")
+            raise
+
+    return wrapper
+
+
+def _probed(method, name: str):
+    @wraps(method)
+    def wrapper(self, key, *args, **kwargs):
+        observe(f"{name}.probes", self._probe_length(key))
+        return method(self, key, *args, **kwargs)
+
+    return wrapper
+
+
+def _timed(method, name: str):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            observe(f"{name}.ms", (time.perf_counter() - started) * 1000.0)
+
+    return wrapper
+
+
+def _timed_status(method, name: str):
+    timed = _timed(method, name)
+
+    @wraps(method)
+    def wrapper(self, end_time, *args, **kwargs):
+        output = timed(self, end_time, *args, **kwargs)
+        if self.start_time <= end_time:
+            observe(f"{name}.steps", self.events().count_before(end_time))
+        return output
+
+    return wrapper
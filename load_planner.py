@@ -0,0 +1,506 @@
+import time
+from math import inf
+
+from city import City
+from custom_types import TruckLoad, VehicleProfile
+from local_search import improve_route
+from packages import Package, Packages, dependency_groups
+
+# Packages due at the end of the day have no real deadline, everything earlier is loaded first.
+_END_OF_DAY = 1439.0
+
+# Moves that save less than this many miles are treated as rounding noise and skipped.
+_EPSILON = 1e-9
+
+
+class _Unit:
+    """
+    A set of packages that must ride on the same truck, because of "Must be delivered with" notes.
+    """
+
+    __slots__ = ("packages", "nodes", "release", "due", "weight", "required_truck")
+
+    def __init__(self, packages: list[Package]) -> None:
+        self.packages = packages
+        self.weight = sum(pkg.weight for pkg in packages)
+        self.nodes = list(dict.fromkeys(pkg.node for pkg in packages))
+        self.release = max(pkg.earliest_availability for pkg in packages)
+        self.due = min(pkg.deadline for pkg in packages)
+
+        trucks = {pkg.required_truck for pkg in packages} - {0}
+        if 1 < len(trucks):
+            ids = sorted(pkg.id for pkg in packages)
+            raise ValueError(f"Packages {ids} must ride together but require trucks {sorted(trucks)}.")
+        self.required_truck = trucks.pop() if trucks else 0
+
+
+class _Load:
+    """
+    The units on one truck while a plan is being built.
+    """
+
+    __slots__ = ("truck_id", "ready", "departure", "profile", "units", "count", "weight", "route")
+
+    def __init__(self, truck_id: int, ready: float, profile: VehicleProfile) -> None:
+        self.truck_id = truck_id
+        self.ready = ready
+        self.departure = ready
+        self.profile = profile
+        self.units: list[_Unit] = []
+        # The package count and weight of the units, kept up to date by add and remove so fits is O(1).
+        self.count = 0
+        self.weight = 0.0
+        self.route: list = []
+
+    def packages(self) -> list[Package]:
+        return [pkg for unit in self.units for pkg in unit.packages]
+
+    def fits(self, unit: _Unit) -> bool:
+        return (
+            self.count + len(unit.packages) <= self.profile.max_packages
+            and self.weight + unit.weight <= self.profile.max_weight
+        )
+
+    def is_full(self) -> bool:
+        return self.profile.max_packages <= self.count or self.profile.max_weight <= self.weight
+
+    def add(self, unit: _Unit) -> None:
+        self.units.append(unit)
+        self.count += len(unit.packages)
+        self.weight += unit.weight
+
+    def remove(self, unit: _Unit) -> None:
+        self.units.remove(unit)
+        self.count -= len(unit.packages)
+        self.weight -= unit.weight
+
+
+class _Pool:
+    """
+    Units waiting to be loaded, indexed by the first node they deliver to.
+    """
+
+    def __init__(self) -> None:
+        self.by_node: dict[int, list[_Unit]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.by_node)
+
+    def add(self, unit: _Unit) -> None:
+        self.by_node.setdefault(unit.nodes[0], []).append(unit)
+
+    def pop(self, node: int) -> _Unit:
+        units = self.by_node[node]
+        unit = units.pop()
+        if not units:
+            del self.by_node[node]
+        return unit
+
+    def units(self) -> list[_Unit]:
+        return [unit for units in self.by_node.values() for unit in units]
+
+
+class LoadPlanner:
+    """
+    Assigns packages to trucks and departure times.
+
+    Packages that must be delivered together form one unit. Trucks are filled in order of the time they are ready
+    to leave: first with the units that require that truck, then with the units that have a deadline, earliest
+    deadline first, then with the rest. Among units with the same deadline (or none), the one closest to the last
+    one loaded is taken next. A truck leaves once every package on it has arrived at the hub. Each truck is routed
+    and, if the route misses a deadline, units that would be late even on a truck of their own are set aside and
+    the last units loaded are unloaded again for later trucks until it is on time. Finally, units are moved
+    between trucks while that shortens the total route length.
+
+    Attributes:
+        city (City): The city the packages are delivered in.
+        trucks (dict[int, float]): The earliest departure time of every truck, keyed by truck ID.
+        profiles (dict[int, VehicleProfile]): The profile of every truck, keyed by truck ID.
+        depot (int): The node every truck leaves from and returns to.
+    """
+
+    def __init__(
+        self,
+        city: City,
+        packages: Packages | list[Package],
+        trucks: dict[int, float],
+        capacity: int = 16,
+        depot: int = 0,
+        neighbors: int = 16,
+        profiles: dict[int, VehicleProfile] | None = None,
+    ) -> None:
+        """
+        Initializes the planner.
+
+        Args:
+            city (City): The city the packages are delivered in.
+            packages (Packages | list[Package]): The packages to load.
+            trucks (dict[int, float]): The earliest departure time of every truck, in minutes since the start of the
+                day, keyed by truck ID.
+            capacity (int, optional): The maximum number of packages on a truck without a profile.
+            depot (int, optional): The node every truck leaves from and returns to.
+            neighbors (int, optional): How many nearby nodes are considered when looking for the next unit to load
+                and when moving units between trucks.
+            profiles (dict[int, VehicleProfile], optional): The speed, capacity and service time of each truck,
+                keyed by truck ID. Trucks without one drive at the default speed and hold capacity packages.
+
+        Raises:
+            ValueError: If packages that must ride together require different trucks or do not fit on any truck.
+        """
+
+        self.city = city
+        self.trucks = trucks
+        self.profiles = {
+            truck_id: (profiles or {}).get(truck_id) or VehicleProfile(max_packages=capacity) for truck_id in trucks
+        }
+        self.depot = depot
+        self._neighbors = neighbors
+
+        # A Packages table resolved the groups of its packages when it was loaded; plain lists are grouped here.
+        grouped = isinstance(packages, Packages)
+        if grouped:
+            packages = packages.values()
+        self._packages = list(packages)
+        for pkg in self._packages:
+            if pkg.node is None:
+                pkg.node = city.address_to_node(pkg.address)
+
+        self._units = [_Unit(group) for group in self._dependency_groups(grouped)]
+        largest = max(profile.max_packages for profile in self.profiles.values()) if trucks else 0
+        heaviest = max(profile.max_weight for profile in self.profiles.values()) if trucks else 0.0
+        for unit in self._units:
+            if largest < len(unit.packages) or heaviest < unit.weight:
+                raise ValueError(
+                    f"{len(unit.packages)} packages weighing {unit.weight:g} kg must ride together, more than any "
+                    "truck holds."
+                )
+
+    def _dependency_groups(self, grouped: bool = False) -> list[list[Package]]:
+        """
+        Splits the packages into groups that must be delivered together, following dependencies transitively.
+
+        If grouped, the packages' own group fields are used, as set by Packages; otherwise the groups are resolved
+        with dependency_groups.
+        """
+
+        group_ids = {}
+        if not grouped:
+            by_id = {pkg.id: pkg for pkg in self._packages}
+            linked = dependency_groups((pkg for pkg in self._packages if pkg.dependencies), by_id.get)
+            group_ids = {pkg.id: group_id for group_id, members in linked.items() for pkg in members}
+
+        # Groups are listed where their first package is, with their packages in the order they were given.
+        groups, members = [], {}
+        for pkg in self._packages:
+            group_id = pkg.group if grouped else group_ids.get(pkg.id, pkg.id)
+            if group_id in members:
+                members[group_id].append(pkg)
+            else:
+                members[group_id] = [pkg]
+                groups.append(members[group_id])
+        return groups
+
+    def _nearest_nodes(self, node: int) -> list:
+        """
+        Returns node and the nodes closest to it, nearest first, from the city's neighbor lists.
+        """
+
+        return [node, *self.city.nearest_nodes(node, self._neighbors)]
+
+    def plan(self, time_budget: float | None = None, allow_late: bool = False) -> list[TruckLoad]:
+        """
+        Assigns every package to a truck and routes the trucks.
+
+        Args:
+            time_budget (float, optional): The maximum number of seconds to spend moving units between trucks
+                after the initial assignment.
+            allow_late (bool, optional): Whether to return a plan that misses deadlines, with the late loads
+                marked in their on_time field, instead of raising. Units that no truck can deliver on time are
+                then loaded on the first idle truck, or else the first truck they fit on.
+
+        Returns:
+            list[TruckLoad]: One load per truck that carries packages, in order of departure.
+
+        Raises:
+            ValueError: If some packages cannot be loaded on any truck, or (unless allow_late) some packages cannot
+                be delivered by their deadlines.
+        """
+
+        loads = [
+            _Load(truck_id, ready, self.profiles[truck_id])
+            for truck_id, ready in sorted(self.trucks.items(), key=lambda item: (item[1], item[0]))
+        ]
+
+        required: dict[int, list[_Unit]] = {}
+        upcoming = []
+        for unit in self._units:
+            if unit.required_truck:
+                required.setdefault(unit.required_truck, []).append(unit)
+            else:
+                upcoming.append(unit)
+        upcoming.sort(key=lambda unit: unit.release, reverse=True)
+
+        # The units waiting at the hub, with one pool per deadline so that urgent units are loaded earliest
+        # deadline first.
+        pools: dict[float, _Pool] = {}
+        # The units that would be late on any truck, kept off the trucks so they do not make other units late.
+        hopeless: list[_Unit] = []
+        for load in loads:
+            # Release the units that have arrived at the hub by the time this truck leaves.
+            required_here = required.pop(load.truck_id, [])
+            load.departure = max([load.ready] + [unit.release for unit in required_here])
+            while upcoming and upcoming[-1].release <= load.departure:
+                unit = upcoming.pop()
+                pools.setdefault(min(unit.due, _END_OF_DAY), _Pool()).add(unit)
+
+            self._fill(load, required_here, [pools[due] for due in sorted(pools)], hopeless)
+            pools = {due: pool for due, pool in pools.items() if pool}
+
+        if hopeless and not allow_late:
+            ids = sorted(pkg.id for unit in hopeless for pkg in unit.packages)
+            raise ValueError(f"Packages {ids} cannot be delivered by their deadlines on any truck.")
+        hopeless = [unit for unit in hopeless if not self._load_anywhere(loads, unit)]
+
+        leftover = [unit for units in required.values() for unit in units] + hopeless + upcoming
+        leftover += [unit for pool in pools.values() for unit in pool.units()]
+        if leftover:
+            ids = sorted(pkg.id for unit in leftover for pkg in unit.packages)
+            raise ValueError(f"Packages {ids} could not be loaded on any truck.")
+
+        loads = [load for load in loads if load.units]
+        self._relocate(loads, time_budget)
+
+        late = [load for load in loads if not self._on_time(load)]
+        if late and not allow_late:
+            ids = sorted(pkg.id for load in late for pkg in load.packages())
+            raise ValueError(f"The trucks carrying packages {ids} cannot deliver all of them by their deadlines.")
+
+        return [
+            TruckLoad(
+                load.truck_id,
+                load.departure,
+                sorted(pkg.id for pkg in load.packages()),
+                load.route,
+                load not in late,
+            )
+            for load in sorted(loads, key=lambda load: (load.departure, load.truck_id))
+        ]
+
+    def _fill(self, load: _Load, required: list, pools: list[_Pool], hopeless: list) -> None:
+        """
+        Loads the required units, then the closest units from each pool in turn, and routes the truck. If the route
+        misses a deadline, the units that would be late even alone are moved to hopeless and, while it still does,
+        the last units loaded are put back into their pools.
+        """
+
+        for unit in required:
+            load.add(unit)
+
+        d = self.city.distance_between
+        loaded = []
+        for pool in pools:
+            skipped = []
+            tail = load.units[-1].nodes[-1] if load.units else self.depot
+            # Once none of the tail's nearest nodes has waiting units, the pool is sorted by distance from the tail
+            # once, and later misses walk down that order instead of scanning the pool again.
+            order, cursor = None, 0
+            while pool and not load.is_full():
+                node = self._closest(tail, pool)
+                if node is None:
+                    if order is None:
+                        order = sorted(pool.by_node, key=lambda other: d(tail, other))
+                    while order[cursor] not in pool.by_node:
+                        cursor += 1
+                    node = order[cursor]
+                unit = pool.pop(node)
+                if not load.fits(unit) or load.departure < unit.release:
+                    skipped.append(unit)
+                    continue
+                load.add(unit)
+                loaded.append((unit, pool))
+                tail = unit.nodes[-1]
+            for unit in skipped:
+                pool.add(unit)
+
+        self._route(load)
+        if self._on_time(load):
+            return
+        # Trucks are filled in order of departure, so a unit that is late alone on this one is late on any later.
+        for unit, pool in list(loaded):
+            if not self._on_time_alone(load, unit):
+                loaded.remove((unit, pool))
+                load.remove(unit)
+                hopeless.append(unit)
+        self._route(load)
+        while loaded and not self._on_time(load):
+            unit, pool = loaded.pop()
+            load.remove(unit)
+            pool.add(unit)
+            self._route(load)
+
+    def _on_time_alone(self, load: _Load, unit: _Unit) -> bool:
+        """
+        Checks whether the truck could deliver unit on time if it carried nothing else.
+        """
+
+        solo = _Load(load.truck_id, load.departure, load.profile)
+        solo.add(unit)
+        self._route(solo)
+        return self._on_time(solo)
+
+    def _load_anywhere(self, loads: list[_Load], unit: _Unit) -> bool:
+        """
+        Loads unit on the first idle truck that leaves after it arrives, or else on the first such truck with room
+        for it, even though it will be late. Returns whether one was found.
+        """
+
+        candidates = [load for load in loads if unit.release <= load.departure and load.fits(unit)]
+        for load in [load for load in candidates if not load.units] + candidates:
+            load.add(unit)
+            self._route(load)
+            return True
+        return False
+
+    def _closest(self, node: int, pool: _Pool) -> int | None:
+        """
+        Returns the nearest node to node that has waiting units in pool, or None if none of the nodes closest to
+        node has any.
+        """
+
+        for candidate in self._nearest_nodes(node):
+            if candidate in pool.by_node:
+                return candidate
+        return None
+
+    def _route(self, load: _Load) -> None:
+        """
+        Routes the truck with nearest neighbor followed by local search, keeping deadlines met if possible.
+        """
+
+        d = self.city.distance_between
+        remaining = {node for unit in load.units for node in unit.nodes}
+        route = [self.depot]
+        while remaining:
+            nearest = min(remaining, key=lambda node: d(route[-1], node))
+            remaining.remove(nearest)
+            route.append(nearest)
+        route.append(self.depot)
+        load.route = route
+        self._improve(load)
+
+    def _improve(self, load: _Load) -> None:
+        """
+        Shortens the truck's route with local search, keeping it on time if it is.
+        """
+
+        packages = load.packages()
+        is_feasible = (
+            (lambda candidate: self.city.route_is_on_time(candidate, packages, load.departure, load.profile))
+            if self._on_time(load)
+            else None
+        )
+        load.route = improve_route(self.city, load.route, is_feasible).route
+
+    def _on_time(self, load: _Load) -> bool:
+        return self.city.route_is_on_time(load.route, load.packages(), load.departure, load.profile)
+
+    def _relocate(self, loads: list[_Load], time_budget: float | None) -> None:
+        """
+        Moves single units to other trucks while that shortens the combined route length.
+
+        A unit is only tried on trucks whose route passes one of the nodes closest to it, and a move is only kept
+        if it respects capacity, release times and required trucks, keeps the first truck on time if it was, and
+        keeps the second truck on time, so that no unit is moved onto a truck that is already late.
+        """
+
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        length = self.city.route_length
+
+        by_node: dict[int, set] = {}
+        for load in loads:
+            for node in load.route[1:-1]:
+                by_node.setdefault(node, set()).add(load)
+
+        changed = set(loads)
+        improved = True
+        while improved:
+            improved = False
+            for source in loads:
+                for unit in list(source.units):
+                    if deadline is not None and deadline <= time.perf_counter():
+                        improved = False
+                        break
+                    if unit.required_truck or len(source.units) == 1:
+                        continue
+
+                    shared = {node for other in source.units if other is not unit for node in other.nodes}
+                    dropped = set(unit.nodes) - shared - {self.depot}
+                    shortened = [node for node in source.route if node not in dropped]
+                    saving = length(source.route) - length(shortened)
+                    if saving <= _EPSILON:
+                        continue
+
+                    targets = set()
+                    for node in self._nearest_nodes(unit.nodes[0]):
+                        targets |= by_node.get(node, set())
+                    targets.discard(source)
+
+                    for target in sorted(targets, key=lambda load: load.truck_id):
+                        if target.departure < unit.release or not target.fits(unit):
+                            continue
+                        lengthened = self._insert_nodes(target.route, unit.nodes)
+                        cost = length(lengthened) - length(target.route)
+                        if saving - cost <= _EPSILON:
+                            continue
+                        if not self._move_keeps_on_time(source, target, unit, shortened, lengthened):
+                            continue
+
+                        source.remove(unit)
+                        source.route = shortened
+                        for node in dropped:
+                            by_node[node].discard(source)
+                        target.add(unit)
+                        target.route = lengthened
+                        for node in unit.nodes:
+                            by_node.setdefault(node, set()).add(target)
+                        changed.update((source, target))
+                        improved = True
+                        break
+                else:
+                    continue
+                break
+
+        for load in changed:
+            self._improve(load)
+
+    def _insert_nodes(self, route: list, nodes: list) -> list:
+        """
+        Returns a copy of route with each of nodes that it does not visit yet inserted where it adds the least.
+        """
+
+        d = self.city.distance_between
+        route = list(route)
+        for node in nodes:
+            if node in route[1:-1]:
+                continue
+            best, at = inf, 1
+            for i in range(len(route) - 1):
+                cost = d(route[i], node) + d(node, route[i + 1]) - d(route[i], route[i + 1])
+                if cost < best:
+                    best, at = cost, i + 1
+            route.insert(at, node)
+        return route
+
+    def _move_keeps_on_time(
+        self, source: _Load, target: _Load, unit: _Unit, shortened: list, lengthened: list
+    ) -> bool:
+        """
+        Checks that moving unit from source to target does not make source late, and leaves target on time.
+        """
+
+        on_time = self.city.route_is_on_time
+        source_packages = [pkg for other in source.units if other is not unit for pkg in other.packages]
+        target_packages = target.packages() + unit.packages
+        if self._on_time(source) and not on_time(shortened, source_packages, source.departure, source.profile):
+            return False
+        return on_time(lengthened, target_packages, target.departure, target.profile)
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from query_service import DEFAULT_PORT, load_plan, start
+
+_TIMES = [f"{hour}:{minute:02d} {meridiem}" for hour, meridiem in ((8, "am"), (9, "am"), (10, "am"), (11, "am"),
+          (12, "pm"), (1, "pm")) for minute in (0, 15, 30, 45)]
+
+
+def _requests(rng: random.Random, count: int, package_ids: list) -> list[bytes]:
+    """
+    Returns count encoded requests: mostly package lookups, with some schedule and miles queries.
+    """
+
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.8:
+            request = {"command": "package", "id": rng.choice(package_ids), "time": rng.choice(_TIMES)}
+        elif roll < 0.95:
+            request = {"command": "schedule", "time": rng.choice(_TIMES)}
+        else:
+            request = {"command": "miles"}
+        requests.append(json.dumps(request).encode() + b"\n")
+    return requests
+
+
+async def _client(host: str, port: int, requests: list[bytes], latencies: list[float]) -> int:
+    """
+    Sends requests one at a time over one connection and records the round trip of each. Returns the number of
+    error responses.
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    errors = 0
+    try:
+        for request in requests:
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - started)
+            errors += not response["ok"]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return errors
+
+
+async def run_load_test(
+    host: str, port: int, clients: int, requests: int, seed: int = 0, in_process: bool = False
+) -> dict:
+    """
+    Runs clients concurrent connections against the query service, each sending requests queries, and returns the
+    latency percentiles in milliseconds and the throughput.
+
+    Args:
+        host (str): The host of the service.
+        port (int): The port of the service.
+        clients (int): The number of concurrent connections.
+        requests (int): The number of queries per connection.
+        seed (int, optional): The seed of the generated queries.
+        in_process (bool, optional): Whether to plan the day and start the service in this process first, instead
+            of connecting to one that is already running. Its answers then share the event loop with the clients.
+
+    Returns:
+        dict: The number of queries and errors, the percentiles and the queries answered per second.
+    """
+
+    server = None
+    if in_process:
+        server = await start(load_plan(), host, port)
+    try:
+        package_ids = list(range(1, 41))
+        rng = random.Random(seed)
+        latencies: list[float] = []
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(_client(host, port, _requests(rng, requests, package_ids), latencies) for _ in range(clients))
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    latencies.sort()
+    milliseconds = [latency * 1000.0 for latency in latencies]
+    return {
+        "queries": len(latencies),
+        "errors": sum(errors),
+        "p50_ms": statistics.median(milliseconds),
+        "p95_ms": milliseconds[int(0.95 * (len(milliseconds) - 1))],
+        "p99_ms": milliseconds[int(0.99 * (len(milliseconds) - 1))],
+        "max_ms": milliseconds[-1],
+        "queries_per_second": len(latencies) / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sends concurrent queries to the status query service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=200, help="queries per connection")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process", action="store_true", help="start the service in this process first")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run_load_test(args.host, args.port, args.clients, args.requests, args.seed, args.in_process)
+    )
+    for name, value in results.items():
+        print(f"{name:20} {value:12.3f}" if isinstance(value, float) else f"{name:20} {value:12}")
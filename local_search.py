@@ -0,0 +1,118 @@
+import time
+from typing import Callable
+
+from city import City
+from custom_types import RouteImprovement
+
+# Moves that save less than this many miles are treated as rounding noise and skipped.
+_EPSILON = 1e-9
+
+
+def improve_route(
+    city: City,
+    route: list,
+    is_feasible: Callable[[list], bool] | None = None,
+    time_budget: float | None = None,
+    max_iterations: int | None = None,
+    neighbors: int = 8,
+) -> RouteImprovement:
+    """
+    Shortens a route with 2-opt and Or-opt moves, keeping its first and last stop (the depot) in place.
+
+    Each candidate move only looks at nodes in the neighbor list of one of its endpoints, and its change in length
+    is worked out from the handful of legs it adds and removes, so evaluating a move is O(1). Moves are applied as
+    soon as they shorten the route, until no improving move is left or the budget runs out.
+
+    Args:
+        city (City): The city whose distances are used.
+        route (list): The route to improve, as a list of node indexes starting and ending at the depot.
+        is_feasible (Callable, optional): Called with a candidate route before an improving move is applied; the
+            move is only kept if it returns True. Used to keep deadlines met.
+        time_budget (float, optional): The maximum number of seconds to search for.
+        max_iterations (int, optional): The maximum number of improving moves to apply.
+        neighbors (int, optional): The length of each node's neighbor list.
+
+    Returns:
+        RouteImprovement: The improved route, the miles saved and the number of moves applied.
+    """
+
+    route = list(route)
+    if len(route) < 5:
+        return RouteImprovement(route, 0.0, 0)
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    d = city.distance_between
+    near = city.neighbor_lists(route[1:-1], neighbors)
+    start_length = city.route_length(route)
+    moves = 0
+
+    def out_of_budget() -> bool:
+        if max_iterations is not None and max_iterations <= moves:
+            return True
+        return deadline is not None and deadline <= time.perf_counter()
+
+    def accept(candidate: list) -> bool:
+        return is_feasible is None or is_feasible(candidate)
+
+    improved = True
+    while improved and not out_of_budget():
+        improved = False
+        position = {node: i for i, node in enumerate(route) if 0 < i < len(route) - 1}
+
+        # 2-opt: replace the legs a-b and c-e with a-c and b-e by reversing the stretch from b to c.
+        for i in range(len(route) - 2):
+            a, b = route[i], route[i + 1]
+            for c in near.get(a, ()):
+                if d(a, b) <= d(a, c):
+                    break  # the neighbor list is sorted, so no later c can help
+                j = position.get(c)
+                if j is None or j <= i + 1:
+                    continue
+                e = route[j + 1]
+                delta = d(a, c) + d(b, e) - d(a, b) - d(c, e)
+                if delta < -_EPSILON:
+                    candidate = route[: i + 1] + route[i + 1 : j + 1][::-1] + route[j + 1 :]
+                    if accept(candidate):
+                        route = candidate
+                        moves += 1
+                        improved = True
+                        break
+            if improved or out_of_budget():
+                break
+        if improved or out_of_budget():
+            continue
+
+        # Or-opt: move a stretch of one to three stops next to a neighbor of its first stop, possibly reversed.
+        for length in (1, 2, 3):
+            for i in range(1, len(route) - length):
+                first, last = route[i], route[i + length - 1]
+                before, after = route[i - 1], route[i + length]
+                removed = d(before, first) + d(last, after) - d(before, after)
+                if removed <= _EPSILON:
+                    continue
+                for c in near.get(first, ()):
+                    j = position.get(c)
+                    if j is None or i - 1 <= j < i + length:
+                        continue
+                    c_next = route[j + 1]
+                    forward = d(c, first) + d(last, c_next) - d(c, c_next)
+                    backward = d(c, last) + d(first, c_next) - d(c, c_next)
+                    added = min(forward, backward)
+                    if added - removed < -_EPSILON:
+                        stretch = route[i : i + length]
+                        if backward < forward:
+                            stretch.reverse()
+                        rest = route[:i] + route[i + length :]
+                        at = j + 1 if j < i else j + 1 - length
+                        candidate = rest[:at] + stretch + rest[at:]
+                        if accept(candidate):
+                            route = candidate
+                            moves += 1
+                            improved = True
+                            break
+                if improved or out_of_budget():
+                    break
+            if improved or out_of_budget():
+                break
+
+    return RouteImprovement(route, start_length - city.route_length(route), moves)
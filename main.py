@@ -1,40 +1,54 @@
 # Student ID: 011651581
 
+import os
+
+import instrumentation
 from city import City
 from datetime import datetime
-from packages import Packages
-from truck import Truck
-
-# These are the base data structures that are used to drive the projects behavior.
-city = City(adj_mat_fp="distances.csv")
-packages = Packages(fname="packages.csv")
-
-
-# Manually loading the packages onto the trucks.
-manifest1 = [1, 13, 15, 30, 29, 31, 34, 37, 40, 19, 14, 16, 20]
-manifest2 = [3, 18, 36, 38, 6, 25, 28, 32, 35, 39, 26, 27, 24]
-manifest3 = [2, 4, 5, 7, 8, 9, 10, 11, 12, 17, 21, 22, 23, 33]
-
-
-def get_packages(manifest):
-    """
-    Converts a manifest (list of integers) to a list of package objects.
-    """
-    selected_packages = []
-    for id in manifest:
-        selected_packages.append(packages[id])
-    return selected_packages
-
+from load_planner import LoadPlanner
+from packages import DeliveryState, Packages
+from truck import DeliveryIndex, Truck
 
-# The individual trucks are initialized.
-truck1 = Truck(1, get_packages(manifest1), city, 480.0)  # starts at 8am
-truck2 = Truck(2, get_packages(manifest2), city, 545.0)  # starts at 9:05am
-truck3 = Truck(3, get_packages(manifest3), city, 620.0)  # starts at 10:20am
+# Set INSTRUMENTATION=1 to record call counts and timings from startup on; the stats command shows them.
+if os.environ.get("INSTRUMENTATION") == "1":
+    instrumentation.enable()
 
-# The find_route method sets the value of the internal route variable for each truck.
-t1r = truck1.find_route()
-t2r = truck2.find_route()
-t3r = truck3.find_route()
+# These are the base data structures that are used to drive the projects behavior.
+city = City(adj_mat_fp="distances.csv", locations_fp="locations.csv")
+packages = Packages(fname="packages.csv", city=city)
+
+
+# packages.csv lists package 9 at its corrected address, but until 10:20am the hub only has the wrong one.
+# The wrong address is kept in an overlay, so the package table keeps the corrected one.
+CORRECTED_ADDRESS = packages[9].address
+listed = DeliveryState()
+listed.set(9, "address", "300 State St")
+listed.set(9, "node", city.address_to_node("300 State St"))
+manifest = {pkg.id: listed.view(pkg) if pkg.id == 9 else pkg for pkg in packages.values()}
+
+# The planner decides which packages go on which truck and when each truck leaves.
+planner = LoadPlanner(city, list(manifest.values()), trucks={1: 480.0, 2: 545.0, 3: 620.0})
+
+# Each truck has few enough stops that its optimal route can be found exactly.
+# The trucks start out on nearest neighbor routes, which are then shortened with local search without missing deadlines.
+trucks = []
+for load in planner.plan():
+    truck = Truck(
+        load.truck_id,
+        [manifest[id] for id in load.package_ids],
+        city,
+        load.departure,
+        exact_limit=14,
+        time_windows=True,
+        profile=planner.profiles[load.truck_id],
+    )
+    if 9 in load.package_ids:
+        truck.readdress_package(9, CORRECTED_ADDRESS, 620.0)  # the correct address comes in at 10:20am
+    truck.improve_route()
+    trucks.append(truck)
+
+# Single package lookups read the planned truck and delivery time of the package instead of replaying every truck.
+deliveries = DeliveryIndex(trucks)
 
 
 def time_str_to_float(time_str):
@@ -73,6 +87,12 @@ def parse(input_str):
     If the command is schedule and there are no arguments, then a default time of 1439 (11:59 pm) is used.
 
     If the command is miles, then the function returns the sum of the total length of todays truck routes in miles.
+
+    If the command is package followed by a package ID, then the function returns the status line of that package at
+    the given time (package ID HH:MM am/pm), or at the end of the day if no time is given.
+
+    If the command is stats, then the function returns the recorded instrumentation, or writes it to a file as JSON if
+    a file name follows (stats FILE).
     """
 
     parts = input_str.split()
@@ -85,39 +105,45 @@ def parse(input_str):
         return None
     if cmd == "schedule" and 1 < len(parts):
         arg = time_str_to_float(" ".join(parts[1:]))
-        return "\n".join(
-            truck1.status_at_time(arg)
-            + truck2.status_at_time(arg)
-            + truck3.status_at_time(arg)
-        )
+        return "\n".join(line for truck in trucks for line in truck.status_at_time(arg))
     if cmd == "schedule":
-        return "\n".join(
-            truck1.status_at_time(1439)
-            + truck2.status_at_time(1439)
-            + truck3.status_at_time(1439)
-        )
+        return "\n".join(line for truck in trucks for line in truck.status_at_time(1439))
+    if cmd == "package" and 1 < len(parts):
+        try:
+            pkg_id = int(parts[1])
+            time = time_str_to_float(" ".join(parts[2:])) if 2 < len(parts) else 1439
+            if pkg_id in deliveries:
+                return deliveries.format(pkg_id, time)
+            return packages.format(pkg_id)
+        except (KeyError, ValueError):
+            return f"{input_str} not recognized. Usage: package ID [HH:MM am/pm], for a package that exists."
     if cmd == "miles":
-        return f"Today's route is {round(sum([truck.route_length for truck in [truck1, truck2, truck3]]), 2)} miles long."
-
-
-# There's some kind "it doesn't work on my machine" bug that requires a variable be set, instead of just using "while True:"
-b = True
-print(
-    "Commands:\n[miles] to view the total miles of the current scheduled routes.\n[schedule] to view the schedule.\n[schedule HH:MM am/pm] (ex: schedule 10:00 am) to view the schedule up to a given time.\n[quit] to quit."
-)
-while b:
-    """
-    The main loop of the program and its interface.
-    
-    The reset method is called after every command, otherwise previous commands would effect the current command. 
-    """
-    i = input("\nType the command and press enter.\n")
-
-    o = parse(i)
-    if o:
-        print(o)
-        truck1.reset()
-        truck2.reset()
-        truck3.reset()
-    else:
-        break
+        return f"Today's route is {round(sum([truck.route_length for truck in trucks]), 2)} miles long."
+    if cmd == "stats" and 1 < len(parts):
+        instrumentation.dump(parts[1])
+        return f"Wrote the stats to {parts[1]}."
+    if cmd == "stats":
+        if not instrumentation.is_enabled():
+            return "Instrumentation is off. Start the program with INSTRUMENTATION=1 to record stats."
+        return instrumentation.report()
+
+
+if __name__ == "__main__":
+    # There's some kind "it doesn't work on my machine" bug that requires a variable be set, instead of just using "while True:"
+    b = True
+    print(
+        "Commands:\n[miles] to view the total miles of the current scheduled routes.\n[schedule] to view the schedule.\n[schedule HH:MM am/pm] (ex: schedule 10:00 am) to view the schedule up to a given time.\n[package ID HH:MM am/pm] (ex: package 17 10:00 am) to view one package at a given time.\n[stats] to view the instrumentation stats, [stats FILE] to write them to FILE as JSON.\n[quit] to quit."
+    )
+    while b:
+        """
+        The main loop of the program and its interface.
+
+        Status queries read the trucks' event logs without changing them, so commands don't affect each other.
+        """
+        i = input("\nType the command and press enter.\n")
+
+        o = parse(i)
+        if o:
+            print(o)
+        else:
+            break
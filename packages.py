@@ -1,104 +1,692 @@
 import csv
 import re
-from datetime import datetime
+from bisect import bisect_left, insort
+from functools import lru_cache
+from heapq import merge
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Tuple
+
+from custom_types import MalformedRow
+from disjoint_set import DisjointSet
 from hash_table import HashTable
 
+if TYPE_CHECKING:
+    from city import City
+
+# Compiled once at import, since the row parser runs for every line of the manifest.
+_TIME_PATTERN = re.compile(r"\s*(\d{1,2}):(\d{2})\s*([AaPp])[Mm]\s*")
+_AVAILABLE_PATTERN = re.compile(r"Available (\d{1,2}:\d{2}\s*[AaPp][Mm])")
+_TRUCK_PATTERN = re.compile(r"Truck (\d+)")
+_DIGITS_PATTERN = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=4096)
+def parse_time(text: str) -> float:
+    """
+    Converts a time formatted like HH:MM am/pm into a float representing the minutes passed since the start of the day.
+
+    Manifests only use a few dozen distinct times, so the results are cached.
+
+    Raises:
+        ValueError: If the text is not a valid 12-hour time.
+    """
+    match = _TIME_PATTERN.fullmatch(text)
+    if match is None:
+        raise ValueError(f"time data {text!r} does not match format '%I:%M %p'")
+
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if not 1 <= hour <= 12 or 59 < minute:
+        raise ValueError(f"time data {text!r} is out of range")
+
+    hour %= 12
+    if meridiem in "Pp":
+        hour += 12
+    return hour * 60.0 + minute
+
+
+class Package:
+    """
+    A single package record.
+
+    The fields are stored in __slots__, so a package costs a handful of pointers instead of a nested hash table and
+    reading a field is a plain attribute load. Item access (package["address"]) is kept for older callers.
+
+    Attributes:
+        id (int): The package ID.
+        address (str): The street address of the destination.
+        city (str): The city of the destination.
+        state (str): The state of the destination.
+        zipcode (str): The zip code of the destination.
+        deadline (float): The delivery deadline in minutes since the start of the day.
+        weight (float): The weight of the package in kilograms.
+        notes (str): The free-form special notes.
+        delivery_status (str): The current delivery status.
+        earliest_availability (float): The time the package arrives at the hub, in minutes since the start of the day.
+        required_truck (int): The truck the package must be loaded on, or 0 if any truck will do.
+        dependencies (list | None): The IDs of packages that must be delivered with this one.
+        group (int): The ID of the group of packages that must be delivered together, following dependencies
+            transitively: the smallest package ID in the group, or the package's own ID if it rides alone.
+        node (int | None): The city node of the address, or None if it has not been resolved against a City.
+    """
+
+    __slots__ = (
+        "id",
+        "address",
+        "city",
+        "state",
+        "zipcode",
+        "deadline",
+        "weight",
+        "notes",
+        "delivery_status",
+        "earliest_availability",
+        "required_truck",
+        "dependencies",
+        "group",
+        "node",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        address: str,
+        city: str,
+        state: str,
+        zipcode: str,
+        deadline: float,
+        weight: float,
+        notes: str,
+        delivery_status: str = "At the hub",
+        earliest_availability: float = 0.0,
+        required_truck: int = 0,
+        dependencies: list | None = None,
+        node: int | None = None,
+        group: int | None = None,
+    ) -> None:
+        self.id = id
+        self.address = address
+        self.city = city
+        self.state = state
+        self.zipcode = zipcode
+        self.deadline = deadline
+        self.weight = weight
+        self.notes = notes
+        self.delivery_status = delivery_status
+        self.earliest_availability = earliest_availability
+        self.required_truck = required_truck
+        self.dependencies = dependencies
+        self.group = id if group is None else group
+        self.node = node
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __repr__(self) -> str:
+        return f"Package(id={self.id}, address={self.address!r}, deadline={self.deadline})"
+
+    def keys(self) -> List[str]:
+        """
+        Returns the field names of the package.
+        """
+
+        return list(self.__slots__)
+
+    def values(self) -> List[Any]:
+        """
+        Returns the field values of the package, in the same order as keys().
+        """
+
+        return [getattr(self, key) for key in self.__slots__]
+
+    def zip(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Returns an iterator over (field name, value) pairs of the package.
+        """
+
+        return zip(self.keys(), self.values())
+
+
+def dependency_groups(
+    packages: Iterable[Package], lookup: Callable[[int], "Package | None"]
+) -> dict[int, list[Package]]:
+    """
+    Groups the packages that must be delivered together, following "Must be delivered with" notes transitively.
+
+    The groups are joined in a DisjointSet, so chains of any length are resolved in near-linear time.
+
+    Args:
+        packages (Iterable[Package]): The packages whose dependencies are followed. Packages without dependencies
+            may be left out; they still join the group of any package that depends on them.
+        lookup (Callable[[int], Package | None]): Returns the package with an ID, or None if there is none.
+            Dependencies on packages that do not exist are ignored.
+
+    Returns:
+        dict[int, list[Package]]: The packages of every group of two or more, keyed by group ID, the smallest
+            package ID in the group.
+
+    Raises:
+        ValueError: If the packages of a group require different trucks.
+    """
+
+    linked = DisjointSet()
+    for pkg in packages:
+        for other in pkg.dependencies or ():
+            if other != pkg.id and lookup(other) is not None:
+                linked.union(pkg.id, other)
+
+    groups = {}
+    for ids in linked.groups().values():
+        members = [lookup(pkg_id) for pkg_id in ids]
+        trucks = {pkg.required_truck for pkg in members} - {0}
+        if 1 < len(trucks):
+            raise ValueError(f"Packages {sorted(ids)} must ride together but require trucks {sorted(trucks)}.")
+        groups[min(ids)] = members
+    return groups
+
+
+class DeliveryState:
+    """
+    The delivery state of packages in one simulation, kept apart from the packages themselves.
+
+    Only the fields a simulation changes are stored, per package ID, and the packages are never modified. Starting
+    a new simulation is creating an empty state, and any number of simulations can share one set of packages.
+
+    Attributes:
+        default_status (str | None): The status of packages this state has not changed, or None to use the
+            package's own delivery_status.
+        delivered (dict[int, float]): The time each delivered package was delivered, keyed by ID, in delivery order.
+    """
+
+    __slots__ = ("default_status", "delivered", "_changes")
+
+    def __init__(self, default_status: str | None = None) -> None:
+        self.default_status = default_status
+        self.delivered: dict[int, float] = {}
+        self._changes: dict[int, dict[str, Any]] = {}
+
+    def get(self, pkg: Package, field: str) -> Any:
+        """
+        Returns the value of a field of a package as this simulation sees it.
+        """
+
+        changes = self._changes.get(pkg.id)
+        if changes is not None and field in changes:
+            return changes[field]
+        if field == "delivery_status" and self.default_status is not None:
+            return self.default_status
+        if field == "delivered_at":
+            return self.delivered.get(pkg.id)
+        return getattr(pkg, field)
+
+    def set(self, pkg_id: int, field: str, value: Any) -> None:
+        """
+        Changes a field of a package in this simulation only.
+
+        Raises:
+            KeyError: If the field is not a package field.
+        """
+
+        if field not in Package.__slots__:
+            raise KeyError(field)
+        self._changes.setdefault(pkg_id, {})[field] = value
+
+    def deliver(self, pkg_id: int, time: float, status: str) -> None:
+        """
+        Records a package as delivered at time, with the given status.
+        """
+
+        self.delivered[pkg_id] = time
+        self.set(pkg_id, "delivery_status", status)
+
+    def view(self, pkg: Package) -> "PackageView":
+        """
+        Returns the package as this simulation sees it.
+        """
+
+        return PackageView(pkg, self)
+
+
+class PackageView:
+    """
+    A package as seen through a DeliveryState. Reading a field returns the simulation's value if it changed it and
+    the package's otherwise; setting a field only changes the simulation's state.
+
+    The underlying package and state are kept in underscored slots, since state is also a package field.
+    """
+
+    __slots__ = ("_package", "_state")
+
+    def __init__(self, package: Package, state: DeliveryState) -> None:
+        object.__setattr__(self, "_package", package)
+        object.__setattr__(self, "_state", state)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in PackageView.__slots__:
+            raise AttributeError(name)  # not set yet, e.g. while unpickling
+        return self._state.get(self._package, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._state.set(self._package.id, name, value)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in Package.__slots__:
+            raise KeyError(key)
+        return self._state.get(self._package, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._state.set(self._package.id, key, value)
+
+    def __reduce__(self):
+        return PackageView, (self._package, self._state)
+
+    def __repr__(self) -> str:
+        return f"PackageView({self._package!r}, status={self.delivery_status!r})"
+
+
+class _SortedIndex:
+    """
+    The (value, package ID) pairs of one field in sorted order, for range queries.
+
+    New pairs are buffered and merged in by the next query: a few at a time with insort, or all at once with a
+    linear merge, so loading a manifest sorts once instead of shifting the list for every package.
+    """
+
+    # Up to this many buffered pairs are inserted one by one; more are sorted and merged in one pass.
+    _INSORT_LIMIT = 64
+
+    __slots__ = ("_entries", "_pending")
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[Any, int]] = []
+        self._pending: list[tuple[Any, int]] = []
+
+    def extend(self, entries: Iterable[tuple[Any, int]]) -> None:
+        self._pending.extend(entries)
+
+    def remove(self, value: Any, pkg_id: int) -> None:
+        self._flush()
+        entries = self._entries
+        index = bisect_left(entries, (value, pkg_id))
+        if index < len(entries) and entries[index] == (value, pkg_id):
+            del entries[index]
+
+    def between(self, low: Any = None, high: Any = None) -> list[int]:
+        """
+        Returns the IDs with low <= value < high (either bound may be None), in order of value and then ID.
+        """
+
+        self._flush()
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        end = len(entries) if high is None else bisect_left(entries, (high,))
+        return [pkg_id for _, pkg_id in entries[start:end]]
+
+    def count_between(self, low: Any = None, high: Any = None) -> int:
+        """
+        Returns the number of IDs with low <= value < high, with two binary searches.
+        """
+
+        self._flush()
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        end = len(entries) if high is None else bisect_left(entries, (high,))
+        return max(end - start, 0)
+
+    def _flush(self) -> None:
+        pending = self._pending
+        if not pending:
+            return
+        pending.sort()
+        if len(pending) <= self._INSORT_LIMIT:
+            for entry in pending:
+                insort(self._entries, entry)
+        else:
+            self._entries = list(merge(self._entries, pending))
+        self._pending = []
+
 
 class Packages(HashTable):
     """
     Extends the HashTable class with the package specific information.
+
+    Secondary indexes are kept for dashboard queries: hash indexes from the value of every field in HASH_INDEXED to
+    the IDs of the packages with that value (see where), and sorted indexes on every field in SORTED_INDEXED for
+    range queries (see between). They are built by the first query and then updated whenever a package is stored or
+    deleted through the table, so a package changed in place must be stored again (packages[pkg.id] = pkg) for the
+    indexes to see the change.
+
+    Packages that must be delivered together are grouped when the manifest is loaded, and every package's group is
+    set to the ID of its group (see dependency_groups and group_of). Packages stored after loading keep the group they
+    were stored with.
+
+    Attributes:
+        errors (list[MalformedRow]): The rows of the last load that could not be parsed and were skipped.
     """
 
-    def __init__(self, fname: str) -> None:
-        packages_size = 40  # Since there are 40 packages, just hardcode it.
-        super().__init__(packages_size)
+    # delivery_status is not indexed: simulations keep it in a DeliveryState and the planned status at any time is
+    # read from truck.DeliveryIndex, so the field of the record itself never changes.
+    HASH_INDEXED = ("zipcode", "city", "required_truck", "group")
+    SORTED_INDEXED = ("deadline", "earliest_availability")
 
-        self._load(fname)
+    def __init__(
+        self,
+        fname: str,
+        size_hint: int | None = None,
+        batch_size: int = 10_000,
+        city: "City | None" = None,
+    ) -> None:
+        """
+        Loads the packages in fname.
+
+        Args:
+            fname (str): The file path of the package CSV.
+            city (City, optional): The city the packages are delivered in. If given, the node of every package's
+                address is looked up once here, so routing code can compare node indexes instead of addresses.
+            size_hint (int, optional): The expected number of packages, used to size the table up front so that
+                loading a large manifest does not have to grow it repeatedly.
+            batch_size (int, optional): The number of rows parsed per batch while loading.
+
+        Raises:
+            ValueError: If packages that must be delivered together require different trucks.
+        """
+        if size_hint is None:
+            super().__init__()
+        else:
+            super().__init__(int(size_hint / self.DEFAULT_LOAD_FACTOR) + 1)
+
+        self.errors: list[MalformedRow] = []
 
-    def _load(self, fname: str) -> None:
+        # The secondary indexes, built by the first query that needs them.
+        self._hash_indexes: dict[str, dict[Any, set[int]]] | None = None
+        self._sorted_indexes: dict[str, _SortedIndex] | None = None
+        # The indexed values of every package as they were when it was indexed, so they can be unindexed later even
+        # if the package has been changed in place since.
+        self._indexed: dict[int, tuple] = {}
+
+        self._load(fname, batch_size, city)
+
+    def __setitem__(self, key: int, value: Package) -> None:
+        super().__setitem__(key, value)
+        if self._hash_indexes is not None:
+            if key in self._indexed:
+                self._unindex(key)
+            self._index([value])
+
+    def __delitem__(self, key: int) -> None:
+        super().__delitem__(key)
+        if self._hash_indexes is not None:
+            self._unindex(key)
+
+    def _build_indexes(self) -> None:
+        """
+        Builds the secondary indexes from every package, once. Loading a manifest does not pay for them until they
+        are queried; from then on they are updated by every store and delete.
+        """
+
+        if self._hash_indexes is not None:
+            return
+        self._hash_indexes = {field: {} for field in self.HASH_INDEXED}
+        self._sorted_indexes = {field: _SortedIndex() for field in self.SORTED_INDEXED}
+        self._index(self.values())
+
+    def _index(self, packages: list[Package]) -> None:
+        """
+        Adds packages that were just stored to the secondary indexes, one field at a time.
+        """
+
+        ids = [pkg.id for pkg in packages]
+        hashed = [list(map(attrgetter(field), packages)) for field in self.HASH_INDEXED]
+        ordered = [list(map(attrgetter(field), packages)) for field in self.SORTED_INDEXED]
+
+        for field, column in zip(self.HASH_INDEXED, hashed):
+            index = self._hash_indexes[field]
+            for value, pkg_id in zip(column, ids):
+                ids_with_value = index.get(value)
+                if ids_with_value is None:
+                    index[value] = {pkg_id}
+                else:
+                    ids_with_value.add(pkg_id)
+        for field, column in zip(self.SORTED_INDEXED, ordered):
+            self._sorted_indexes[field].extend(zip(column, ids))
+        self._indexed.update(zip(ids, zip(zip(*hashed), zip(*ordered))))
+
+    def _unindex(self, key: int) -> None:
+        hashed, ordered = self._indexed.pop(key)
+        for field, field_value in zip(self.HASH_INDEXED, hashed):
+            ids = self._hash_indexes[field][field_value]
+            ids.discard(key)
+            if not ids:
+                del self._hash_indexes[field][field_value]
+        for field, field_value in zip(self.SORTED_INDEXED, ordered):
+            self._sorted_indexes[field].remove(field_value, key)
+
+    def group_of(self, pkg_id: int) -> list[Package]:
+        """
+        Returns the packages that must be delivered together with a package, itself included, in ID order.
+
+        Raises:
+            KeyError: If there is no package with that ID.
+        """
+
+        package = self[pkg_id]
+        if package is None:
+            raise KeyError(pkg_id)
+        return self.where("group", package.group)
+
+    def where(self, field: str, value: Any) -> list[Package]:
+        """
+        Returns the packages whose field equals value, in ID order, from the hash index of the field.
+
+        Raises:
+            KeyError: If the field is not in HASH_INDEXED.
+        """
+
+        self._build_indexes()
+        return [self[pkg_id] for pkg_id in sorted(self._hash_indexes[field].get(value, ()))]
+
+    def count_where(self, field: str, value: Any) -> int:
+        """
+        Returns the number of packages whose field equals value, without looking at the packages.
+
+        Raises:
+            KeyError: If the field is not in HASH_INDEXED.
+        """
+
+        self._build_indexes()
+        return len(self._hash_indexes[field].get(value, ()))
+
+    def between(self, field: str, low: Any = None, high: Any = None) -> list[Package]:
+        """
+        Returns the packages with low <= field < high, sorted by the field, from its sorted index. Either bound may
+        be None; for example between("deadline", high=630.0) returns every package due before 10:30 am.
+
+        Raises:
+            KeyError: If the field is not in SORTED_INDEXED.
+        """
+
+        self._build_indexes()
+        return [self[pkg_id] for pkg_id in self._sorted_indexes[field].between(low, high)]
+
+    def count_between(self, field: str, low: Any = None, high: Any = None) -> int:
+        """
+        Returns the number of packages with low <= field < high in O(log n), without looking at the packages.
+
+        Raises:
+            KeyError: If the field is not in SORTED_INDEXED.
+        """
+
+        self._build_indexes()
+        return self._sorted_indexes[field].count_between(low, high)
+
+    def _load(
+        self, fname: str, batch_size: int = 10_000, city: "City | None" = None
+    ) -> None:
         """
         Loads the file from fname.
 
+        Rows that cannot be parsed are recorded in self.errors instead of aborting the load. Once every row is
+        stored, the packages with dependencies are grouped with the packages they must be delivered with.
+
+        Raises:
+            ValueError: If packages that must be delivered together require different trucks.
+        """
+        linked = []
+        for batch in self.iter_batches(
+            fname, batch_size, on_error=self.errors.append, city=city
+        ):
+            for package in batch:
+                self[package.id] = package
+                if package.dependencies:
+                    linked.append(package)
+
+        for group_id, members in dependency_groups(linked, self._get).items():
+            for package in members:
+                package.group = group_id
+
+    @classmethod
+    def iter_batches(
+        cls,
+        fname: str,
+        batch_size: int = 10_000,
+        on_error: Callable[[MalformedRow], None] | None = None,
+        city: "City | None" = None,
+    ) -> Iterator[list[Package]]:
+        """
+        Streams the package CSV in fname as lists of at most batch_size parsed packages.
+
+        Only one batch is held in memory at a time, so manifests of any length can be processed without building a
+        Packages table. Blank rows are skipped. Rows that cannot be parsed are passed to on_error (if given) and
+        skipped, including rows whose address is not in city (if a city is given).
+
         This function assumes a very specific formatting for the CSV.
         """
         with open(file=fname, mode="r", newline="", encoding="utf-8-sig") as file:
             csv_reader = csv.reader(file, delimiter=",")
+            batch = []
             for row in csv_reader:
-                package = HashTable()
-                package["id"] = int(row[0])
-                package["address"] = row[1]
-                package["city"] = row[2]
-                package["state"] = row[3]
-                package["zipcode"] = row[4]
-                package["deadline"] = self._convert_deadline(row[5])
-                package["weight"] = float(row[6])
-                package["notes"] = row[7]
-                package["delivery_status"] = "At the hub"
+                if not row or not any(row):
+                    continue
+                try:
+                    batch.append(cls._parse_row(row, city))
+                except (ValueError, IndexError, KeyError) as error:
+                    if on_error is not None:
+                        on_error(MalformedRow(csv_reader.line_num, row, str(error)))
+                    continue
 
-                package["earliest_availability"] = self._available(row[7])
-                package["required_truck"] = self._truck(row[7])
-                package["dependencies"] = self._dependencies(row[7])
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
 
-                self[int(row[0])] = package
+            if batch:
+                yield batch
 
-    def _convert_deadline(self, deadline: str) -> float:
+    @classmethod
+    def _parse_row(cls, row: list[str], city: "City | None" = None) -> Package:
+        """
+        Converts one CSV row into a Package, resolving its node against city if one is given.
+
+        Raises:
+            ValueError: If a numeric or time field cannot be parsed.
+            IndexError: If the row is missing required fields.
+            KeyError: If the address is not a location in city.
+        """
+        notes = row[7] if len(row) > 7 else ""
+        return Package(
+            id=int(row[0]),
+            address=row[1],
+            city=row[2],
+            state=row[3],
+            zipcode=row[4],
+            deadline=cls._convert_deadline(row[5]),
+            weight=float(row[6]),
+            notes=notes,
+            earliest_availability=cls._available(notes),
+            required_truck=cls._truck(notes),
+            dependencies=cls._dependencies(notes),
+            node=city.address_to_node(row[1]) if city is not None else None,
+        )
+
+    @staticmethod
+    def _convert_deadline(deadline: str) -> float:
         """
         Extracts the deadline from the field, converting it to a float representing the minutes passed since the start of the day.
         """
         if "EOD" in deadline:
             return 1439.0
         else:
-            time = datetime.strptime(deadline, "%I:%M %p").time()
-            return time.hour * 60.0 + time.minute
+            return parse_time(deadline)
 
-    def _available(self, notes: str) -> float:
+    @staticmethod
+    def _available(notes: str) -> float:
         """
         Extracts the earliest time available from the notes field and returns a float representing the minutes passed since the start of the day.
         """
-        if "Available " in notes:
-            time = notes.split("Available ")[1]
-            time = datetime.strptime(time, "%I:%M %p").time()
-            return time.hour * 60 + time.minute
+        match = _AVAILABLE_PATTERN.search(notes)
+        if match:
+            return parse_time(match.group(1))
         else:
             return 0.0
 
-    def _truck(self, notes: str) -> int:
+    @staticmethod
+    def _truck(notes: str) -> int:
         """
         Extracts the truck constraint from the notes field and returns the truck ID as an integer.
 
-        Since there is only a constraint for Truck 2 in the dataset, this function has been hardcoded to check
-        for Truck 2.
+        Returns 0 if the package may ride on any truck.
         """
-        if "Truck 2" in notes:
-            return 2
+        match = _TRUCK_PATTERN.search(notes)
+        if match:
+            return int(match.group(1))
         else:
             return 0
 
-    def _dependencies(self, notes: str) -> list:
+    @staticmethod
+    def _dependencies(notes: str) -> list:
         """
         Extracts dependent packages (packages that must ride with other packages) from the notes section.
 
         Returns a list of integers containing the package IDs.
         """
         if "Must be delivered with " in notes:
-            ints = re.findall(r"\d+", notes)
-            return [int(i) for i in ints]
+            return [int(i) for i in _DIGITS_PATTERN.findall(notes)]
         else:
             return None
 
     def select_all(self, key: int | str) -> list:
         """
         Returns all the values associated with that key, does not return values that are none or empty.
+
+        Fields with a sorted index are read from it instead of sorting every package.
         """
+        if key in self.SORTED_INDEXED:
+            return [pkg for pkg in self.between(key) if getattr(pkg, key) is not None and getattr(pkg, key) != ""]
         return sorted(
             [
                 package
                 for package in self.values()
-                if package[key] is not None and package[key] != ""
+                if getattr(package, key) is not None and getattr(package, key) != ""
             ],
-            key=lambda package: package[key],
+            key=lambda package: getattr(package, key),
         )
 
     def format(self, pkg_id: int) -> str:
-        pkg = self.packages[pkg_id]
-        return f"Package #{pkg_id}, status: [{pkg["delivery_status"]}], destination: [{pkg["address"]}, {pkg["city"]} {pkg["state"]} {pkg["zipcode"]}], weight: {pkg["weight"]}kg, notes: \"{pkg["notes"]}\""
+        """
+        Returns the status line of one package, with its own delivery_status. The planned status at a given time
+        is shown by truck.DeliveryIndex.
+
+        Raises:
+            KeyError: If there is no package with that ID.
+        """
+
+        pkg = self[pkg_id]
+        if pkg is None:
+            raise KeyError(pkg_id)
+        return f"Package #{pkg.id}, status: [{pkg.delivery_status}], destination: [{pkg.address}, {pkg.city} {pkg.state} {pkg.zipcode}], weight: {pkg.weight}kg, notes: \"{pkg.notes}\""
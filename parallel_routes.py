@@ -0,0 +1,199 @@
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from heapq import nsmallest
+
+from city import City
+from custom_types import Tour, VehicleProfile
+from local_search import improve_route
+
+# The city of a worker process, opened from the shared binary distance file by _init_worker.
+_city: City | None = None
+
+
+def _init_worker(distance_fp: str) -> None:
+    """
+    Opens the binary distance file in a worker process. The file is memory-mapped, so every worker reads the same
+    pages and the matrix is never pickled.
+    """
+
+    global _city
+    _city = City(distance_fp)
+
+
+def _randomized_route(city: City, nodes: list, rng: random.Random | None, depot: int = 0) -> list:
+    """
+    Builds a nearest neighbor route. With rng, each step picks at random among the three nearest unvisited nodes,
+    so that every seed starts the local search somewhere else.
+    """
+
+    d = city.distance_between
+    remaining = set(nodes) - {depot}
+    route = [depot]
+    while remaining:
+        here = route[-1]
+        if rng is None:
+            following = min(remaining, key=lambda node: d(here, node))
+        else:
+            following = rng.choice(nsmallest(3, remaining, key=lambda node: d(here, node)))
+        remaining.remove(following)
+        route.append(following)
+    route.append(depot)
+    return route
+
+
+def _search(*args) -> tuple[int, list] | None:
+    """
+    Runs one restart in a worker process, on the city opened by _init_worker. Takes the arguments of _restart
+    after city.
+    """
+
+    return _restart(_city, *args)
+
+
+def _restart(
+    city: City,
+    truck_id: int,
+    packages: list,
+    start_time: float,
+    depot: int,
+    profile: VehicleProfile,
+    seed: int,
+    deadline: float,
+) -> tuple[int, list] | None:
+    """
+    Runs one restart for one truck and returns the truck ID and the route found, or None if the wall-clock deadline
+    passed before the search could start.
+    """
+
+    budget = deadline - time.time()
+    if budget <= 0:
+        return None
+
+    rng = None if seed == 0 else random.Random(seed)
+    route = _randomized_route(city, [pkg.node for pkg in packages], rng, depot)
+
+    is_feasible = (
+        (lambda candidate: city.route_is_on_time(candidate, packages, start_time, profile))
+        if city.route_is_on_time(route, packages, start_time, profile)
+        else None
+    )
+    return truck_id, improve_route(city, route, is_feasible, time_budget=budget).route
+
+
+def optimize_routes(
+    trucks: list,
+    restarts: int = 8,
+    time_budget: float = 10.0,
+    processes: int | None = None,
+    seed: int = 0,
+) -> dict[int, Tour]:
+    """
+    Searches for better routes for several trucks at once, spreading the trucks and their restarts over a pool of
+    worker processes.
+
+    Every restart builds a randomized nearest neighbor route (the first one a plain nearest neighbor route) and
+    shortens it with local search. Workers read distances from a memory-mapped binary distance file that is opened
+    once per worker; a city loaded from a CSV or built in memory is converted to a temporary one first. Binary files
+    only hold the lower triangle, so an asymmetric city is searched in this process instead, one restart after
+    another. When the budget runs out, restarts that have not started are cancelled. Candidates are scored again
+    with the trucks' own city, and each truck keeps the shortest on-time route among them and its current route (or
+    simply the shortest, if none is on time). The trucks' routes are replaced with the winners.
+
+    Args:
+        trucks (list[Truck]): The trucks to route. They must share one city.
+        restarts (int, optional): The number of searches per truck.
+        time_budget (float, optional): The wall-clock budget in seconds.
+        processes (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        seed (int, optional): The seed the randomized restarts are derived from.
+
+    Returns:
+        dict[int, Tour]: The chosen route and its length, keyed by truck ID.
+    """
+
+    deadline = time.time() + time_budget
+    if not trucks:
+        return {}
+    city = trucks[0].city
+
+    candidates: dict[int, list] = {truck.id: [truck.route] for truck in trucks}
+    if not city.is_symmetric:
+        for restart in range(restarts):
+            for truck in trucks:
+                result = _restart(
+                    city,
+                    truck.id,
+                    truck.packages,
+                    truck.start_time,
+                    truck.depot,
+                    truck.profile,
+                    seed + restart,
+                    deadline,
+                )
+                if result is not None:
+                    candidates[truck.id].append(result[1])
+        return _keep_best(trucks, candidates)
+
+    temporary = None
+    distance_fp = city.adj_mat_fp
+    if not city.is_binary:
+        handle, temporary = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        if city.adj_mat_fp is None:
+            City.write_binary(temporary, (city[node][: node + 1] for node in city.nodes))
+        else:
+            City.convert_csv_to_binary(city.adj_mat_fp, temporary)
+        distance_fp = temporary
+
+    try:
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(distance_fp,))
+        try:
+            pending = {
+                executor.submit(
+                    _search,
+                    truck.id,
+                    truck.packages,
+                    truck.start_time,
+                    truck.depot,
+                    truck.profile,
+                    seed + restart,
+                    deadline,
+                )
+                for restart in range(restarts)
+                for truck in trucks
+            }
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        candidates[result[0]].append(result[1])
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if temporary is not None:
+            os.remove(temporary)
+
+    return _keep_best(trucks, candidates)
+
+
+def _keep_best(trucks: list, candidates: dict[int, list]) -> dict[int, Tour]:
+    """
+    Gives every truck the shortest on-time route among its candidates (or the shortest, if none is on time).
+    """
+
+    city = trucks[0].city
+    best = {}
+    for truck in trucks:
+        routes = candidates[truck.id]
+        on_time = [route for route in routes if truck.is_on_time(route)]
+        route = min(on_time or routes, key=city.route_length)
+        truck.route = route
+        truck.route_length = truck.get_route_length()
+        best[truck.id] = Tour(route, truck.route_length)
+    return best
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import json
+
+from packages import parse_time
+from truck import DeliveryIndex
+
+# Schedule queries without a time show the whole day, like the schedule command of main.py.
+_END_OF_DAY = 1439.0
+
+DEFAULT_PORT = 8765
+
+
+class Plan:
+    """
+    A read-only snapshot of the day's plan that status queries are answered from.
+
+    Every truck's day is simulated once, when the plan is built. Queries only binary search the event logs and look
+    packages up in a DeliveryIndex; they never change a truck, so any number of clients can be answered without
+    resets or locks. The trucks must not be changed after the plan is built.
+
+    Attributes:
+        miles (float): The total length of the trucks' routes.
+    """
+
+    def __init__(self, trucks: list) -> None:
+        self._trucks = tuple(trucks)
+        self._deliveries = DeliveryIndex(self._trucks)
+        self.miles = sum(truck.route_length for truck in self._trucks)
+
+    def schedule(self, time: float) -> list[str]:
+        """
+        Returns the status lines of every truck and its packages at time, as shown by the schedule command.
+        """
+
+        return [line for truck in self._trucks for line in truck.status_at_time(time) if line.strip()]
+
+    def package(self, pkg_id: int, time: float) -> dict:
+        """
+        Returns the status of one package at time.
+
+        Raises:
+            KeyError: If the package is not on any truck.
+        """
+
+        record = self._deliveries[pkg_id]
+        return {
+            "id": pkg_id,
+            "truck": record.truck.id,
+            "status": self._deliveries.status(pkg_id, time),
+            "address": record.truck.address_at(record.package, time),
+            "line": self._deliveries.format(pkg_id, time),
+        }
+
+    def truck_miles(self) -> dict:
+        """
+        Returns the length of every truck's route, keyed by truck ID, and their total.
+        """
+
+        return {
+            "total": round(self.miles, 2),
+            "trucks": {truck.id: round(truck.route_length, 2) for truck in self._trucks},
+        }
+
+
+def _query_time(request: dict) -> float:
+    """
+    Returns the time of a request, given either as minutes since the start of the day or as HH:MM am/pm.
+    """
+
+    time = request.get("time", _END_OF_DAY)
+    if isinstance(time, str):
+        return parse_time(time.strip())
+    if isinstance(time, (int, float)) and not isinstance(time, bool):
+        return float(time)
+    raise ValueError(f"time must be minutes or HH:MM am/pm, not {time!r}")
+
+
+def answer(plan: Plan, request: dict) -> dict:
+    """
+    Answers one request.
+
+    Requests are JSON objects with a command and its arguments:
+
+    - {"command": "schedule", "time": "10:00 am"} returns the status lines of every truck at time (default: the end
+      of the day).
+    - {"command": "package", "id": 9, "time": "10:00 am"} returns the status of one package at time.
+    - {"command": "miles"} returns the length of every route and their total.
+
+    Returns:
+        dict: {"ok": true, "result": ...}, or {"ok": false, "error": ...} for a request that cannot be answered.
+    """
+
+    try:
+        command = request["command"]
+        if command == "schedule":
+            result = plan.schedule(_query_time(request))
+        elif command == "package":
+            result = plan.package(int(request["id"]), _query_time(request))
+        elif command == "miles":
+            result = plan.truck_miles()
+        else:
+            raise ValueError(f"unknown command {command!r}")
+    except KeyError as error:
+        return {"ok": False, "error": f"not found: {error}"}
+    except (TypeError, ValueError) as error:
+        return {"ok": False, "error": str(error)}
+    return {"ok": True, "result": result}
+
+
+async def _serve_client(plan: Plan, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    Answers the requests of one connection, one JSON object per line, until the client disconnects.
+    """
+
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("requests must be JSON objects")
+            except ValueError as error:  # json.JSONDecodeError is a ValueError too
+                response = {"ok": False, "error": f"malformed request: {error}"}
+            else:
+                response = answer(plan, request)
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start(plan: Plan, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.Server:
+    """
+    Starts answering queries about plan on host and port. Each connection sends JSON requests, one per line, and
+    gets one JSON response line for each, in order.
+
+    Returns:
+        asyncio.Server: The running server.
+    """
+
+    return await asyncio.start_server(lambda reader, writer: _serve_client(plan, reader, writer), host, port)
+
+
+async def _serve_forever(plan: Plan, host: str, port: int) -> None:
+    server = await start(plan, host, port)
+    print(f"Answering queries on {host}:{port}.")
+    async with server:
+        await server.serve_forever()
+
+
+def load_plan() -> Plan:
+    """
+    Plans the day as main.py does and returns it as a Plan.
+    """
+
+    from main import trucks
+
+    return Plan(trucks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answers status queries about today's plan over JSON on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve_forever(load_plan(), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
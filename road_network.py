@@ -0,0 +1,344 @@
+import csv
+import hashlib
+import heapq
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+
+from city import City
+
+# Below this many sources the pool costs more to start than the searches take, so they run in this process.
+_PARALLEL_THRESHOLD = 16
+
+# The graph of a worker process, sent once by _init_worker.
+_graph: tuple | None = None
+
+
+class RoadNetwork:
+    """
+    A sparse road network read from an edge list, for maps too large to hold a full distance matrix.
+
+    The edges are kept in compressed sparse row form: the edges leaving the node at index i are
+    targets[offsets[i]:offsets[i + 1]], with the matching lengths in weights. Node IDs in the file do not have to
+    be contiguous; they are mapped to indexes in the order they first appear.
+
+    Attributes:
+        directed (bool): Whether each edge is one way. Otherwise every edge can be driven in both directions.
+        ids (list[int]): The node ID at every index.
+        graph_hash (str): The SHA-256 of the edges, which identifies the network in the shortest path cache.
+    """
+
+    def __init__(self, edges_fp: str, locations_fp: str | None = None, directed: bool = False) -> None:
+        """
+        Loads the network from an edge list.
+
+        Args:
+            edges_fp (str): The file path of the edge list, a CSV with one edge per row: the node ID it leaves, the
+                node ID it enters and its length in miles.
+            locations_fp (str, optional): The file path of the locations table, which lists the node ID and
+                address of the nodes that can be delivered to.
+            directed (bool, optional): Whether each edge is one way.
+
+        Raises:
+            ValueError: If a row is not an edge, or an edge has a negative length.
+        """
+
+        self.directed = directed
+        self.ids: list[int] = []
+        self._index: dict[int, int] = {}
+        self._address_index: dict[str, int] = {}
+        self._node_addresses: dict[int, str] = {}
+
+        edges = self._load(edges_fp)
+        self.offsets, self.targets, self.weights = self._compress(edges)
+        self.graph_hash = self._hash()
+        if locations_fp is not None:
+            self._load_locations(locations_fp)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _node_index(self, node: int) -> int:
+        index = self._index.get(node)
+        if index is None:
+            index = self._index[node] = len(self.ids)
+            self.ids.append(node)
+        return index
+
+    def _load(self, filename: str) -> list[tuple[int, int, float]]:
+        edges = []
+        with open(file=filename, mode="r", newline="", encoding="utf-8-sig") as file:
+            for line_number, row in enumerate(csv.reader(file, delimiter=","), start=1):
+                try:
+                    a, b, miles = int(row[0]), int(row[1]), float(row[2])
+                except (IndexError, ValueError) as error:
+                    raise ValueError(f"{filename}, line {line_number}: {error}") from error
+                if miles < 0:
+                    raise ValueError(f"{filename}, line {line_number}: negative edge length {miles}")
+                a, b = self._node_index(a), self._node_index(b)
+                edges.append((a, b, miles))
+                if not self.directed:
+                    edges.append((b, a, miles))
+        return edges
+
+    def _compress(self, edges: list) -> tuple[array, array, array]:
+        """
+        Sorts the edges by the node they leave and packs them into the offsets, targets and weights arrays.
+        """
+
+        edges.sort()
+        offsets = array("q", [0]) * (len(self.ids) + 1)
+        for a, _, _ in edges:
+            offsets[a + 1] += 1
+        for i in range(len(self.ids)):
+            offsets[i + 1] += offsets[i]
+        targets = array("q", (b for _, b, _ in edges))
+        weights = array("d", (miles for _, _, miles in edges))
+        return offsets, targets, weights
+
+    def _hash(self) -> str:
+        digest = hashlib.sha256(b"directed" if self.directed else b"undirected")
+        digest.update(array("q", self.ids).tobytes())
+        for values in (self.offsets, self.targets, self.weights):
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def _load_locations(self, filename: str) -> None:
+        with open(file=filename, mode="r", newline="", encoding="utf-8-sig") as file:
+            for row in csv.reader(file, delimiter=","):
+                node, address = int(row[0]), row[1]
+                if node not in self._index:
+                    raise KeyError(node)
+                self._node_addresses[node] = address
+                self._address_index[address] = node
+
+    def address_to_node(self, address: str) -> int:
+        """
+        Returns the node ID of an address.
+
+        Raises:
+            KeyError: If the address is not found in the locations table.
+        """
+
+        return self._address_index[address]
+
+    def terminals(self, addresses: list, depot: int) -> list[int]:
+        """
+        Returns the node IDs a day's deliveries touch: the depot first, then the node of every address in the
+        order they first appear, without repeats.
+
+        Args:
+            addresses (list[str]): The delivery addresses.
+            depot (int): The node ID of the depot.
+
+        Raises:
+            KeyError: If the depot is not in the network or an address is not in the locations table.
+        """
+
+        if depot not in self._index:
+            raise KeyError(depot)
+        return list(dict.fromkeys([depot, *(self.address_to_node(address) for address in addresses)]))
+
+    def shortest_paths(
+        self, terminals: list, processes: int | None = None, cache_dir: str | None = None
+    ) -> "ShortestPaths":
+        """
+        Computes the shortest paths between every pair of terminals.
+
+        Runs Dijkstra's algorithm with a binary heap from each terminal, which stops as soon as every other terminal
+        is settled, so a day's deliveries cost O(k (m + n) log n) for k terminals instead of the n^2 matrix of the
+        whole map. The searches are independent and are spread over a pool of worker processes. Only the distances
+        between terminals and the parts of each search tree that lie on those paths are kept.
+
+        With cache_dir, the result is stored there in a file named after the graph hash and the terminals, and read
+        back instead of computed whenever the same terminals are asked for on the same network.
+
+        Args:
+            terminals (list[int]): The node IDs to connect, typically from terminals().
+            processes (int, optional): The number of worker processes. Defaults to the number of CPUs; with 1, or
+                with few terminals, the searches run in this process.
+            cache_dir (str, optional): The directory of the shortest path cache.
+
+        Returns:
+            ShortestPaths: The distances and paths between the terminals.
+
+        Raises:
+            KeyError: If a terminal is not in the network.
+        """
+
+        sources = [self._index[node] for node in terminals]
+
+        cache_fp = None
+        if cache_dir is not None:
+            key = hashlib.sha256(",".join(str(node) for node in terminals).encode()).hexdigest()
+            cache_fp = os.path.join(cache_dir, f"{self.graph_hash[:32]}-{key[:32]}.json")
+            if os.path.exists(cache_fp):
+                return ShortestPaths.load(cache_fp, self)
+
+        graph = (self.offsets, self.targets, self.weights)
+        if processes == 1 or len(sources) < _PARALLEL_THRESHOLD:
+            results = [_dijkstra(graph, source, sources) for source in sources]
+        else:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(graph,)) as executor:
+                results = list(executor.map(_search, sources, [sources] * len(sources)))
+
+        ids = self.ids
+        paths = ShortestPaths(
+            self,
+            list(terminals),
+            [distances for distances, _ in results],
+            [{ids[node]: ids[previous] for node, previous in tree.items()} for _, tree in results],
+        )
+        if cache_fp is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            paths.dump(cache_fp)
+        return paths
+
+
+class ShortestPaths:
+    """
+    The shortest paths between the terminals of a road network.
+
+    Attributes:
+        terminals (list[int]): The node IDs of the terminals. Terminal i is node i of the city built by to_city.
+        distances (list[list[float]]): The length of the shortest path from terminal i to terminal j in row i,
+            column j, or inf if there is none.
+    """
+
+    def __init__(self, network: RoadNetwork, terminals: list, distances: list, trees: list) -> None:
+        self.network = network
+        self.terminals = terminals
+        self.distances = distances
+        # The predecessor of every node on a shortest path from terminal i, as node IDs.
+        self._trees: list[dict[int, int]] = trees
+        self._position = {node: i for i, node in enumerate(terminals)}
+
+    def path(self, a: int, b: int) -> list[int]:
+        """
+        Returns the node IDs along the shortest path from terminal a to terminal b, both included.
+
+        Raises:
+            KeyError: If a or b is not a terminal.
+            ValueError: If b cannot be reached from a.
+        """
+
+        tree = self._trees[self._position[a]]
+        if self.distances[self._position[a]][self._position[b]] == inf:
+            raise ValueError(f"Node {b} cannot be reached from node {a}.")
+
+        path = [b]
+        while path[-1] != a:
+            path.append(tree[path[-1]])
+        path.reverse()
+        return path
+
+    def expand_route(self, route: list) -> list[int]:
+        """
+        Returns the turn-by-turn path of a route of the city built by to_city, as the node IDs of every
+        intersection driven through.
+        """
+
+        nodes = [self.terminals[route[0]]] if route else []
+        for a, b in zip(route, route[1:]):
+            nodes.extend(self.path(self.terminals[a], self.terminals[b])[1:])
+        return nodes
+
+    def to_city(self, use_numpy: bool = True) -> City:
+        """
+        Builds a City whose nodes are the terminals, in order, with the shortest path distances between them and
+        the addresses of the network's locations table. Terminals without an address get their node ID.
+
+        On an undirected network the searches from a and from b add the same edges in a different order, so the two
+        distances can differ in the last bit; the smaller one is used both ways, so the city is exactly symmetric.
+        """
+
+        distances = self.distances
+        if not self.network.directed:
+            distances = [
+                [min(distance, distances[b][a]) for b, distance in enumerate(row)] for a, row in enumerate(distances)
+            ]
+        addresses = [self.network._node_addresses.get(node, str(node)) for node in self.terminals]
+        return City.from_matrix(distances, addresses, use_numpy)
+
+    def dump(self, fname: str) -> None:
+        """
+        Writes the terminals, distances and path trees to fname as JSON.
+        """
+
+        data = {
+            "graph_hash": self.network.graph_hash,
+            "terminals": self.terminals,
+            "distances": self.distances,
+            "trees": [list(tree.items()) for tree in self._trees],
+        }
+        with open(fname, mode="w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, fname: str, network: RoadNetwork) -> "ShortestPaths":
+        """
+        Reads shortest paths written by dump.
+
+        Raises:
+            ValueError: If they were computed on a different network.
+        """
+
+        with open(fname, encoding="utf-8") as file:
+            data = json.load(file)
+        if data["graph_hash"] != network.graph_hash:
+            raise ValueError(f"{fname} was computed on a different road network.")
+        trees = [{node: previous for node, previous in tree} for tree in data["trees"]]
+        return cls(network, data["terminals"], data["distances"], trees)
+
+
+def _init_worker(graph: tuple) -> None:
+    global _graph
+    _graph = graph
+
+
+def _search(source: int, terminals: list) -> tuple[list, dict]:
+    return _dijkstra(_graph, source, terminals)
+
+
+def _dijkstra(graph: tuple, source: int, terminals: list) -> tuple[list[float], dict[int, int]]:
+    """
+    Runs Dijkstra's algorithm from the node at index source until every terminal is settled.
+
+    Returns:
+        tuple[list[float], dict[int, int]]: The distance to every terminal, in order (inf if unreachable), and the
+            predecessor of every node on the shortest paths to them, by index.
+    """
+
+    offsets, targets, weights = graph
+    distance = [inf] * (len(offsets) - 1)
+    distance[source] = 0.0
+    previous: dict[int, int] = {}
+    remaining = set(terminals)
+    remaining.discard(source)
+
+    heap = [(0.0, source)]
+    while heap and remaining:
+        miles, node = heapq.heappop(heap)
+        if distance[node] < miles:
+            continue  # a stale entry, the node was settled through a shorter path
+        remaining.discard(node)
+        for edge in range(offsets[node], offsets[node + 1]):
+            target = targets[edge]
+            total = miles + weights[edge]
+            if total < distance[target]:
+                distance[target] = total
+                previous[target] = node
+                heapq.heappush(heap, (total, target))
+
+    tree: dict[int, int] = {}
+    for terminal in terminals:
+        if terminal in remaining:
+            continue
+        node = terminal
+        while node != source and node not in tree:
+            tree[node] = previous[node]
+            node = previous[node]
+
+    return [inf if terminal in remaining else distance[terminal] for terminal in terminals], tree
@@ -0,0 +1,93 @@
+import heapq
+from bisect import bisect_left
+
+from city import City
+from custom_types import Event
+
+
+class EventLog:
+    """
+    The events of a simulated day in time order.
+
+    The event times are kept in their own list so that the log can be binary searched for any point in time.
+
+    Attributes:
+        events (list[Event]): The events, sorted by time.
+        times (list[float]): The time of every event, in the same order.
+    """
+
+    def __init__(self, events: list[Event]) -> None:
+        self.events = events
+        self.times = [event.time for event in events]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def count_before(self, time: float) -> int:
+        """
+        Returns the number of events that happen strictly before time.
+        """
+
+        return bisect_left(self.times, time)
+
+    def for_truck(self, truck_id: int) -> "EventLog":
+        """
+        Returns the events of one truck as a log of its own.
+        """
+
+        return EventLog([event for event in self.events if event.truck_id == truck_id])
+
+
+def simulate(city: City, trucks: list) -> EventLog:
+    """
+    Runs the day's deliveries of every truck as a discrete-event simulation.
+
+    Each truck has one pending event, its arrival at the next stop on its route, in a priority queue ordered by
+    time. Popping an event records it, delivers the packages for that stop and schedules the truck's next arrival,
+    so the whole day is simulated once in O(e log t) for e stops and t trucks. Arrival times are worked out from the
+    miles driven since the truck left and the stops made on the way, with the speed and service time of the truck's
+    profile, so they do not drift over long routes and match City.time_at_each_stop.
+
+    Args:
+        city (City): The city the trucks drive in.
+        trucks (list[Truck]): The trucks, each with a route, start time, profile, packages_by_node index and the
+            ready_at times of packages changed during the day.
+
+    Returns:
+        EventLog: One event per stop of every truck, including its departure from and return to the depot.
+    """
+
+    queue = []
+    waiting = []
+    for order, truck in enumerate(trucks):
+        waiting.append({node: list(ids) for node, ids in truck.packages_by_node.items()})
+        if truck.route:
+            queue.append((truck.start_time, order, 0, 0.0))
+    heapq.heapify(queue)
+
+    events = []
+    while queue:
+        time, order, index, miles = heapq.heappop(queue)
+        truck = trucks[order]
+        node = truck.route[index]
+        delivered = ()
+        ids = waiting[order].get(node)
+        if ids:
+            # Packages changed during the day are only delivered by visits after the change.
+            delivered = tuple(id for id in ids if truck.ready_at.get(id, time) <= time)
+            if len(delivered) == len(ids):
+                del waiting[order][node]
+            else:
+                waiting[order][node] = [id for id in ids if id not in delivered]
+        events.append(Event(time, truck.id, node, miles, delivered))
+
+        if index + 1 < len(truck.route):
+            miles += city.distance_between(node, truck.route[index + 1])
+            profile = truck.profile
+            arrival = truck.start_time + profile.minutes(miles) + profile.service_minutes * index
+            heapq.heappush(queue, (arrival, order, index + 1, miles))
+
+    return EventLog(events)
@@ -0,0 +1,148 @@
+import csv
+import math
+import random
+
+from city import City
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, distances are computed in plain Python without it.
+    np = None
+
+# Synthetic addresses are derived from the node index, so manifests can be generated without reading the city.
+_STREET = "Synthetic Ave"
+_DEADLINES = ("9:00 AM", "10:30 AM", "12:00 PM", "EOD")
+_DELAYED = ("Available 9:05 am", "Available 10:20 am")
+
+
+def synthetic_address(node: int) -> str:
+    return f"{node} {_STREET}"
+
+
+def _points(nodes: int, seed: int, clusters: int, width: float) -> list[tuple[float, float]]:
+    """
+    Returns seeded random coordinates for every node, uniform over a width by width square, or scattered around
+    clusters centers if clusters is positive. Node 0 (the depot) is always in the middle.
+    """
+
+    rng = random.Random(seed)
+    centers = [(rng.uniform(0, width), rng.uniform(0, width)) for _ in range(clusters)]
+    spread = width / (4 * math.sqrt(clusters)) if clusters else 0.0
+
+    points = [(width / 2, width / 2)]
+    for _ in range(1, nodes):
+        if centers:
+            x, y = rng.choice(centers)
+            points.append((rng.gauss(x, spread), rng.gauss(y, spread)))
+        else:
+            points.append((rng.uniform(0, width), rng.uniform(0, width)))
+    return points
+
+
+def write_city(
+    bin_fp: str,
+    locations_fp: str,
+    nodes: int,
+    seed: int = 0,
+    clusters: int = 0,
+    width: float = 20.0,
+) -> int:
+    """
+    Writes a synthetic city: a binary distance file and its locations table.
+
+    Distances are straight-line distances in miles between seeded random points, rounded to a tenth of a mile
+    like distances.csv. The matrix is streamed one row at a time, so it is never held in memory; the binary file
+    still takes 2 * nodes^2 bytes on disk (about 5 GB for 50,000 nodes).
+
+    Args:
+        bin_fp (str): The file path of the binary distance file to write.
+        locations_fp (str): The file path of the locations table to write.
+        nodes (int): The number of nodes, the depot included.
+        seed (int, optional): The random seed.
+        clusters (int, optional): The number of clusters the nodes are grouped in, or 0 for uniform points.
+        width (float, optional): The width of the square the points lie in, in miles.
+
+    Returns:
+        int: The number of nodes written.
+    """
+
+    points = _points(nodes, seed, clusters, width)
+
+    if np is not None:
+        xs = np.array([x for x, _ in points])
+        ys = np.array([y for _, y in points])
+        rows = (np.round(np.hypot(xs[: i + 1] - xs[i], ys[: i + 1] - ys[i]), 1) for i in range(nodes))
+    else:
+        rows = ([round(math.dist(point, other), 1) for other in points[: i + 1]] for i, point in enumerate(points))
+    City.write_binary(bin_fp, rows)
+
+    with open(locations_fp, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for node in range(nodes):
+            writer.writerow([node, synthetic_address(node)])
+    return nodes
+
+
+def write_manifest(
+    fname: str,
+    packages: int,
+    nodes: int,
+    seed: int = 0,
+    trucks: int = 3,
+    deadline_share: float = 0.3,
+    delayed_share: float = 0.05,
+    truck_share: float = 0.05,
+    group_share: float = 0.05,
+) -> int:
+    """
+    Writes a synthetic package manifest in the format of packages.csv, for a city written by write_city.
+
+    Every package goes to a random node other than the depot. Shares of the packages get a deadline before the end
+    of the day, a delayed arrival at the hub, a required truck, or a "Must be delivered with" note naming one or
+    two earlier packages. Dependencies only link packages without other constraints and each package is in at most
+    one group, so groups stay small and never require two trucks. Rows are written as they are generated.
+
+    Args:
+        fname (str): The file path of the manifest to write.
+        packages (int): The number of packages.
+        nodes (int): The number of nodes of the city.
+        seed (int, optional): The random seed.
+        trucks (int, optional): The number of trucks required trucks are chosen from.
+        deadline_share (float, optional): The share of packages with a deadline before the end of the day.
+        delayed_share (float, optional): The share of packages that arrive at the hub late.
+        truck_share (float, optional): The share of packages that require a truck.
+        group_share (float, optional): The share of packages that must be delivered with others.
+
+    Returns:
+        int: The number of packages written.
+    """
+
+    rng = random.Random(seed)
+    # Recent packages without constraints of their own, which later packages may be grouped with.
+    free: list[int] = []
+
+    with open(fname, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for id in range(1, packages + 1):
+            node = rng.randrange(1, nodes)
+            deadline = rng.choice(_DEADLINES[:-1]) if rng.random() < deadline_share else "EOD"
+            weight = rng.randint(1, 88)
+
+            notes = ""
+            roll = rng.random()
+            if roll < delayed_share:
+                notes = rng.choice(_DELAYED)
+            elif roll < delayed_share + truck_share:
+                notes = f"Truck {rng.randint(1, trucks)}"
+            elif roll < delayed_share + truck_share + group_share and 2 <= len(free):
+                others = sorted(free.pop(rng.randrange(len(free))) for _ in range(rng.randint(1, 2)))
+                notes = f"Must be delivered with {', '.join(str(other) for other in others)}"
+            else:
+                free.append(id)
+                if 64 < len(free):
+                    free.pop(0)
+
+            writer.writerow(
+                [id, synthetic_address(node), "Salt Lake City", "UT", "84101", deadline, weight, notes]
+            )
+    return packages
@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from disjoint_set import DisjointSet
+
+
+class DisjointSetTest(unittest.TestCase):
+    def test_groups_follow_unions_transitively(self):
+        sets = DisjointSet(range(6))
+        sets.union(0, 1)
+        sets.union(2, 1)
+        sets.union(4, 5)
+        self.assertEqual(sets.find(0), sets.find(2))
+        self.assertNotEqual(sets.find(0), sets.find(3))
+        self.assertEqual(sorted(sorted(group) for group in sets.groups().values()), [[0, 1, 2], [3], [4, 5]])
+
+    def test_find_adds_new_items(self):
+        sets = DisjointSet()
+        self.assertEqual(sets.find("a"), "a")
+        self.assertIn("a", sets)
+        self.assertEqual(len(sets), 1)
+
+    def test_long_chain(self):
+        sets = DisjointSet()
+        for item in range(100_000):
+            sets.union(item, item + 1)
+        self.assertEqual(len(sets.groups()), 1)
+        self.assertEqual(sets.find(0), sets.find(100_000))
+
+    def test_matches_connected_components(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            edges = [(rng.randrange(40), rng.randrange(40)) for _ in range(rng.randint(0, 60))]
+            sets = DisjointSet(range(40))
+            for a, b in edges:
+                sets.union(a, b)
+
+            linked = {node: {node} for node in range(40)}
+            for a, b in edges:
+                linked[a].add(b)
+                linked[b].add(a)
+            for node in range(40):
+                seen, stack = {node}, [node]
+                while stack:
+                    for other in linked[stack.pop()] - seen:
+                        seen.add(other)
+                        stack.append(other)
+                with self.subTest(seed=seed, node=node):
+                    self.assertEqual({other for other in range(40) if sets.find(other) == sets.find(node)}, seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import copy
+import pickle
+import random
+import unittest
+
+from hash_table import HashTable
+
+
+class _Collider:
+    """
+    A key whose hash only has a few distinct values, so that entries share probe chains.
+    """
+
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def __hash__(self) -> int:
+        return self.value % 3
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Collider) and self.value == other.value
+
+    def __repr__(self) -> str:
+        return f"_Collider({self.value})"
+
+
+class HashTableTest(unittest.TestCase):
+    def assertMatches(self, table: HashTable, expected: dict) -> None:
+        self.assertEqual(len(table), len(expected))
+        self.assertEqual(dict(table.zip()), expected)
+        for key, value in expected.items():
+            self.assertIn(key, table)
+            self.assertEqual(table[key], value)
+
+    def test_random_operations_match_dict(self):
+        for seed in range(300):
+            rng = random.Random(seed)
+            make_key = _Collider if seed % 5 == 0 else int
+            table, expected = HashTable(), {}
+            for _ in range(rng.randint(1, 400)):
+                key = make_key(rng.randrange(64))
+                roll = rng.random()
+                if roll < 0.55:
+                    table[key] = expected[key] = rng.random()
+                elif roll < 0.9 and key in expected:
+                    del table[key]
+                    del expected[key]
+                else:
+                    self.assertEqual(key in table, key in expected)
+                    self.assertEqual(table[key], expected.get(key))
+            with self.subTest(seed=seed):
+                self.assertMatches(table, expected)
+
+    def test_missing_keys(self):
+        table = HashTable()
+        table[1] = "a"
+        self.assertIsNone(table[2])
+        self.assertNotIn(2, table)
+        with self.assertRaises(KeyError):
+            del table[2]
+
+    def test_many_deletes_keep_probes_terminating(self):
+        table = HashTable()
+        for key in range(10_000):
+            table[key] = key
+            del table[key]
+        self.assertEqual(len(table), 0)
+        self.assertNotIn(-1, table)
+
+    def test_resize_during_migration(self):
+        table, expected = HashTable(size=8), {}
+        # Growing by thousands of keys in a row starts a new rehash before the last one has finished.
+        for key in range(5_000):
+            table[key] = expected[key] = str(key)
+        self.assertMatches(table, expected)
+
+    def test_pickle_and_deepcopy_round_trip(self):
+        rng = random.Random(0)
+        table, expected = HashTable(), {}
+        for _ in range(500):
+            key = rng.randrange(200)
+            if key in expected and rng.random() < 0.4:
+                del table[key]
+                del expected[key]
+            else:
+                table[key] = expected[key] = [key]
+        for restored in (pickle.loads(pickle.dumps(table)), copy.deepcopy(table)):
+            self.assertMatches(restored, expected)
+            restored[-1] = "new"
+            self.assertNotIn(-1, table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from city import City
+from load_planner import LoadPlanner
+from packages import Package
+
+# Node positions along a straight road, in miles from the hub. At 18 miles per hour, 12 miles take 40 minutes.
+_POSITIONS = [0.0, 12.0, -12.0, 1.0, 60.0]
+
+
+def _package(id: int, node: int, deadline: float) -> Package:
+    return Package(id, f"{node} Main St", "Salt Lake City", "UT", "84101", deadline, 1.0, "", node=node)
+
+
+class LoadPlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.city = City.from_matrix([[abs(a - b) for b in _POSITIONS] for a in _POSITIONS], use_numpy=False)
+
+    def assertOnTime(self, planner: LoadPlanner, loads: list, packages: list) -> None:
+        by_id = {pkg.id: pkg for pkg in packages}
+        for load in loads:
+            manifest = [by_id[id] for id in load.package_ids]
+            on_time = self.city.route_is_on_time(load.route, manifest, load.departure, planner.profiles[load.truck_id])
+            self.assertEqual(load.on_time, on_time)
+
+    def test_urgent_packages_move_to_an_idle_truck(self):
+        # One truck cannot reach both ends of the road by 9:00 am, so the second package must ride on truck 2.
+        packages = [_package(1, 1, 540.0), _package(2, 2, 540.0), _package(3, 3, 630.0)]
+        planner = LoadPlanner(self.city, packages, trucks={1: 480.0, 2: 480.0})
+        loads = planner.plan()
+        self.assertEqual(len(loads), 2)
+        self.assertTrue(all(load.on_time for load in loads))
+        self.assertOnTime(planner, loads, packages)
+
+    def test_earliest_deadline_is_loaded_first(self):
+        # The nearest package is due last, so loading nearest first would leave the 9:00 am package for 11:00 am.
+        packages = [_package(1, 3, 720.0), _package(2, 1, 540.0)]
+        planner = LoadPlanner(self.city, packages, trucks={1: 480.0, 2: 660.0}, capacity=1)
+        loads = planner.plan()
+        self.assertEqual([(load.truck_id, load.package_ids) for load in loads], [(1, [2]), (2, [1])])
+        self.assertTrue(all(load.on_time for load in loads))
+
+    def test_late_packages_raise_or_are_reported(self):
+        # The hub is 200 minutes from node 4, so package 4 cannot make a 9:00 am deadline on any truck.
+        packages = [_package(1, 1, 540.0), _package(2, 2, 540.0), _package(4, 4, 540.0)]
+        planner = LoadPlanner(self.city, packages, trucks={1: 480.0, 2: 480.0, 3: 480.0})
+        with self.assertRaises(ValueError):
+            planner.plan()
+
+        loads = planner.plan(allow_late=True)
+        self.assertOnTime(planner, loads, packages)
+        late = [load for load in loads if not load.on_time]
+        # The late package rides alone, so it does not make the others late.
+        self.assertEqual([load.package_ids for load in late], [[4]])
+        self.assertEqual(sorted(id for load in loads for id in load.package_ids), [1, 2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import random
+import unittest
+
+from packages import Package, Packages
+
+_MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages.csv")
+
+
+class PackagesQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.packages = Packages(_MANIFEST)
+
+    def assertQueriesMatchScan(self, packages: Packages, rng: random.Random) -> None:
+        """
+        Checks where and between, and their counts, against a scan of every package.
+        """
+
+        everything = sorted(packages.values(), key=lambda pkg: pkg.id)
+        for field in Packages.HASH_INDEXED:
+            for value in {pkg[field] for pkg in everything} | {"missing"}:
+                expected = [pkg for pkg in everything if pkg[field] == value]
+                self.assertEqual(packages.where(field, value), expected)
+                self.assertEqual(packages.count_where(field, value), len(expected))
+        for field in Packages.SORTED_INDEXED:
+            values = sorted({pkg[field] for pkg in everything})
+            bounds = [None, values[0] - 1.0, values[-1] + 1.0, *rng.sample(values, min(4, len(values)))]
+            for low in bounds:
+                for high in bounds:
+                    inside = [
+                        pkg
+                        for pkg in everything
+                        if (low is None or low <= pkg[field]) and (high is None or pkg[field] < high)
+                    ]
+                    expected = sorted(inside, key=lambda pkg: (pkg[field], pkg.id))
+                    with self.subTest(field=field, low=low, high=high):
+                        self.assertEqual(packages.between(field, low, high), expected)
+                        self.assertEqual(packages.count_between(field, low, high), len(expected))
+
+    def test_queries_on_the_manifest(self):
+        self.assertQueriesMatchScan(self.packages, random.Random(0))
+        self.assertEqual([pkg.id for pkg in self.packages.between("deadline", high=600.0)], [15])
+        self.assertEqual(self.packages.count_where("required_truck", 2), 4)
+
+    def test_queries_follow_stores_and_deletes(self):
+        rng = random.Random(1)
+        self.assertEqual(self.packages.count_between("deadline"), 40)  # builds the indexes before the changes
+        next_id = 41
+        for _ in range(30):
+            roll = rng.random()
+            ids = [pkg.id for pkg in self.packages.values()]
+            if roll < 0.3:
+                # Large batches are merged into the sorted indexes, small ones inserted one by one.
+                for _ in range(rng.choice((1, 100))):
+                    self.packages[next_id] = Package(
+                        next_id,
+                        "1060 Dalton Ave S",
+                        rng.choice(("Salt Lake City", "Murray")),
+                        "UT",
+                        rng.choice(("84104", "84107")),
+                        rng.choice((540.0, 630.0, 1439.0)),
+                        1.0,
+                        "",
+                        earliest_availability=rng.choice((0.0, 545.0)),
+                    )
+                    next_id += 1
+            elif roll < 0.6:
+                del self.packages[rng.choice(ids)]
+            else:
+                # A package changed in place is stored again so the indexes see the change.
+                pkg = self.packages[rng.choice(ids)]
+                pkg.deadline = rng.choice((540.0, 630.0, 1439.0))
+                pkg.zipcode = rng.choice(("84104", "84107", "84115"))
+                self.packages[pkg.id] = pkg
+            self.assertQueriesMatchScan(self.packages, rng)
+
+    def test_unindexed_fields_raise(self):
+        with self.assertRaises(KeyError):
+            self.packages.where("delivery_status", "At the hub")
+        with self.assertRaises(KeyError):
+            self.packages.between("weight", 1.0, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
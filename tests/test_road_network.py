@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import unittest
+from math import inf
+
+from road_network import RoadNetwork
+
+
+def _floyd_warshall(nodes: list, edges: list, directed: bool) -> dict:
+    """
+    Returns the shortest distance between every pair of nodes, keyed by (from, to).
+    """
+
+    distance = {(a, b): 0.0 if a == b else inf for a in nodes for b in nodes}
+    for a, b, miles in edges:
+        distance[a, b] = min(distance[a, b], miles)
+        if not directed:
+            distance[b, a] = min(distance[b, a], miles)
+    for via in nodes:
+        for a in nodes:
+            through = distance[a, via]
+            if through == inf:
+                continue
+            for b in nodes:
+                if through + distance[via, b] < distance[a, b]:
+                    distance[a, b] = through + distance[via, b]
+    return distance
+
+
+class ShortestPathsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_network(self, seed: int, directed: bool) -> tuple[RoadNetwork, list, list]:
+        """
+        Writes a random edge list, with node IDs that are not contiguous and some parallel edges, and loads it.
+        """
+
+        rng = random.Random(seed)
+        nodes = rng.sample(range(1000), 30)
+        edges = [(rng.choice(nodes), rng.choice(nodes), round(rng.uniform(0.1, 5.0), 1)) for _ in range(70)]
+        edges = [(a, b, miles) for a, b, miles in edges if a != b]
+        edges_fp = os.path.join(self.directory.name, f"edges-{seed}-{directed}.csv")
+        with open(edges_fp, "w", encoding="utf-8") as file:
+            file.writelines(f"{a},{b},{miles}\n" for a, b, miles in edges)
+        return RoadNetwork(edges_fp, directed=directed), edges, rng.sample(sorted({a for a, _, _ in edges}), 18)
+
+    def assertMatchesFloydWarshall(self, directed: bool, processes: int) -> None:
+        for seed in range(10):
+            network, edges, terminals = self.make_network(seed, directed)
+            expected = _floyd_warshall(network.ids, edges, directed)
+            lengths = {}
+            for a, b, miles in edges:
+                lengths[a, b] = min(lengths.get((a, b), inf), miles)
+                if not directed:
+                    lengths[b, a] = min(lengths.get((b, a), inf), miles)
+
+            paths = network.shortest_paths(terminals, processes=processes)
+            for i, a in enumerate(terminals):
+                for j, b in enumerate(terminals):
+                    with self.subTest(seed=seed, a=a, b=b):
+                        if expected[a, b] == inf:
+                            self.assertEqual(paths.distances[i][j], inf)
+                            with self.assertRaises(ValueError):
+                                paths.path(a, b)
+                            continue
+                        self.assertAlmostEqual(paths.distances[i][j], expected[a, b])
+                        path = paths.path(a, b)
+                        self.assertEqual((path[0], path[-1]), (a, b))
+                        self.assertAlmostEqual(sum(lengths[step] for step in zip(path, path[1:])), expected[a, b])
+
+            city = paths.to_city(use_numpy=False)
+            if not directed:
+                self.assertTrue(city.is_symmetric)
+            for i in range(len(terminals)):
+                for j in range(len(terminals)):
+                    self.assertAlmostEqual(city.distance_between(i, j), paths.distances[i][j])
+
+    def test_undirected_matches_floyd_warshall(self):
+        self.assertMatchesFloydWarshall(directed=False, processes=1)
+
+    def test_directed_matches_floyd_warshall(self):
+        self.assertMatchesFloydWarshall(directed=True, processes=1)
+
+    def test_worker_processes_and_cache_give_the_same_paths(self):
+        network, _, terminals = self.make_network(0, directed=True)
+        serial = network.shortest_paths(terminals, processes=1)
+        cache_dir = os.path.join(self.directory.name, "cache")
+        for paths in (
+            network.shortest_paths(terminals, processes=2, cache_dir=cache_dir),
+            network.shortest_paths(terminals, processes=1, cache_dir=cache_dir),  # read back from the cache
+        ):
+            self.assertEqual(paths.distances, serial.distances)
+            for a in terminals:
+                for b in terminals:
+                    if serial.distances[terminals.index(a)][terminals.index(b)] < inf:
+                        self.assertEqual(paths.path(a, b), serial.path(a, b))
+
+
+if __name__ == "__main__":
+    unittest.main()
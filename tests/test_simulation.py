@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from city import City
+from custom_types import VehicleProfile
+from load_planner import LoadPlanner
+from packages import Packages
+from simulation import simulate
+from truck import Truck, formatclock, formatpkg
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StatusAtTimeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.city = City(os.path.join(_ROOT, "distances.csv"), os.path.join(_ROOT, "locations.csv"))
+        cls.packages = Packages(os.path.join(_ROOT, "packages.csv"), city=cls.city)
+
+    def make_trucks(self, profile: VehicleProfile) -> list:
+        profiles = {truck_id: profile for truck_id in (1, 2, 3)}
+        planner = LoadPlanner(self.city, self.packages, trucks={1: 480.0, 2: 545.0, 3: 620.0}, profiles=profiles)
+        trucks = []
+        for load in planner.plan(allow_late=True):
+            manifest = [self.packages[id] for id in load.package_ids]
+            truck = Truck(load.truck_id, manifest, self.city, load.departure, profile=profile)
+            truck.route = load.route
+            trucks.append(truck)
+        return trucks
+
+    def replay(self, trucks: list, time: float) -> dict:
+        """
+        Replays the events of the whole fleet that happen before time and returns the status lines of every truck.
+        """
+
+        reached = {truck.id: [] for truck in trucks}
+        for event in simulate(self.city, trucks):
+            if time <= event.time:
+                break
+            reached[event.truck_id].append(event)
+
+        lines = {}
+        for truck in trucks:
+            if time < truck.start_time:
+                lines[truck.id] = [f"Truck {truck.id} has not left the depot."]
+                lines[truck.id] += [f"\t{formatpkg(pkg, 'At the hub')}" for pkg in truck.packages]
+                continue
+
+            events = reached[truck.id]
+            remaining = truck.events().events[len(events) :]
+            miles = events[-1].miles if events else 0.0
+            if events and remaining:
+                # The truck waits out its service time at every stop after the depot, then drives toward the next.
+                left = events[-1].time + (truck.profile.service_minutes if 1 < len(events) else 0.0)
+                driven = truck.profile.speed * max(time - left, 0.0) / 60.0
+                miles = min(miles + driven, remaining[0].miles)
+
+            by_id = {pkg.id: pkg for pkg in truck.packages}
+            delivered = {pkg_id: event.time for event in events for pkg_id in event.package_ids}
+            lines[truck.id] = [f"Truck {truck.id}: {round(miles, 2)} miles"]
+            lines[truck.id] += [
+                f"\t{formatpkg(by_id[pkg_id], f'Delivered at {formatclock(at)}')}" for pkg_id, at in delivered.items()
+            ]
+            lines[truck.id] += [f"\t{formatpkg(pkg, 'En route')}" for pkg in truck.packages if pkg.id not in delivered]
+        return lines
+
+    def assertMatchesReplay(self, trucks: list) -> None:
+        times = sorted({event.time for truck in trucks for event in truck.events()})
+        # Every event time, just before and after it, and times when trucks are between stops or not out yet.
+        probes = [470.0, 480.0, 500.0, 544.9, 545.0, 600.0, 619.9, 700.0, 900.0]
+        probes += [time + offset for time in times for offset in (-0.01, 0.0, 0.01)]
+        for time in probes:
+            expected = self.replay(trucks, time)
+            for truck in trucks:
+                with self.subTest(truck=truck.id, time=time):
+                    self.assertEqual(truck.status_at_time(time)[1:], expected[truck.id])
+
+    def test_status_matches_event_log_replay(self):
+        self.assertMatchesReplay(self.make_trucks(VehicleProfile()))
+
+    def test_status_matches_replay_with_service_time(self):
+        self.assertMatchesReplay(self.make_trucks(VehicleProfile(service_minutes=3.0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
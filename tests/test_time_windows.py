@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from city import City
+from time_windows import insert_node
+
+
+class InsertNodeTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(12)]
+        self.city = City.from_matrix(
+            [[((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 for bx, by in points] for ax, ay in points],
+            use_numpy=False,
+        )
+
+    def brute_force(self, route: list, node: int, due: dict, first: int) -> float | None:
+        """
+        Returns the fewest miles node can be inserted for at or after first without missing a deadline, trying
+        every position.
+        """
+
+        best = None
+        for at in range(max(first, 1), len(route)):
+            candidate = route[:at] + [node] + route[at:]
+            if self.city.route_meets_deadlines(candidate, due, 480.0):
+                added = self.city.route_length(candidate) - self.city.route_length(route)
+                if best is None or added < best - 1e-9:
+                    best = added
+        return best
+
+    def test_matches_brute_force(self):
+        for seed in range(200):
+            rng = random.Random(seed)
+            stops = rng.sample(range(1, 12), rng.randint(1, 8))
+            route = [0, *stops, 0]
+            arrival = [480.0, *self.city.time_at_each_stop(route, 480.0)]
+            # Deadlines between just missed and comfortably met, so that some insertions are ruled out.
+            due = {stop: arrival[i] + rng.uniform(-1.0, 30.0) for i, stop in enumerate(route[1:-1], 1)}
+            if not self.city.route_meets_deadlines(route, due, 480.0):
+                continue
+            node = rng.choice([node for node in range(1, 12) if node not in stops])
+            due[node] = rng.uniform(480.0, 620.0)
+            first = rng.randint(1, len(route) - 1)
+
+            expected = self.brute_force(route, node, due, first)
+            with self.subTest(seed=seed):
+                if expected is None:
+                    with self.assertRaises(ValueError):
+                        insert_node(self.city, route, node, 480.0, due, first)
+                    continue
+                inserted = insert_node(self.city, route, node, 480.0, due, first)
+                # The stops before first are kept, and the rest of the route keeps its order.
+                self.assertEqual(inserted[:first], route[:first])
+                self.assertGreaterEqual(inserted.index(node), first)
+                self.assertEqual([stop for stop in inserted if stop != node], route)
+                self.assertTrue(self.city.route_meets_deadlines(inserted, due, 480.0))
+                added = self.city.route_length(inserted) - self.city.route_length(route)
+                self.assertAlmostEqual(added, expected)
+
+    def test_without_deadlines_takes_the_cheapest_position(self):
+        route = [0, 3, 5, 8, 0]
+        inserted = insert_node(self.city, route, 9, 480.0)
+        added = self.city.route_length(inserted) - self.city.route_length(route)
+        self.assertAlmostEqual(added, self.brute_force(route, 9, {}, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
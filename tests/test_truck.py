@@ -0,0 +1,132 @@
+import os
+import re
+import unittest
+
+from city import City
+from load_planner import LoadPlanner
+from packages import Packages
+from truck import DeliveryIndex, Truck
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _delivery(truck: Truck, pkg_id: int):
+    """
+    Returns the event in the truck's log that delivers a package, or None if it is never delivered.
+    """
+
+    for event in truck.events():
+        if pkg_id in event.package_ids:
+            return event
+    return None
+
+
+class MidDayChangeTest(unittest.TestCase):
+    IDS = [2, 4, 5, 7, 8, 10, 11, 12]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.city = City(os.path.join(_ROOT, "distances.csv"), os.path.join(_ROOT, "locations.csv"))
+        cls.packages = Packages(os.path.join(_ROOT, "packages.csv"), city=cls.city)
+
+    def make_truck(self, ids: list) -> Truck:
+        return Truck(1, [self.packages[id] for id in ids], self.city, 480.0)
+
+    def last_delivered(self, truck: Truck) -> int:
+        return max((pkg.id for pkg in truck.packages), key=lambda id: _delivery(truck, id).time)
+
+    def test_readdress_keeps_the_driven_route(self):
+        truck = self.make_truck(self.IDS)
+        before = list(truck.events())
+        # Change the address of the package delivered last, once the truck has made a few stops.
+        pkg_id = self.last_delivered(truck)
+        time = before[3].time + 1.0
+        old_address = self.packages[pkg_id].address
+        address = self.packages[40].address
+        node = self.city.address_to_node(address)
+        kept = truck.events().count_before(time) + 1
+        old_route = list(truck.route)
+
+        truck.readdress_package(pkg_id, address, time)
+
+        self.assertEqual(truck.route[:kept], old_route[:kept])
+        self.assertEqual(list(truck.events())[: kept - 1], before[: kept - 1])
+        delivery = _delivery(truck, pkg_id)
+        self.assertEqual(delivery.node, node)
+        self.assertGreaterEqual(delivery.time, time)
+        self.assertIn(f"destination: [{old_address},", "".join(truck.status_at_time(time - 1.0)))
+        self.assertIn(f"destination: [{address},", "".join(truck.status_at_time(delivery.time + 1.0)))
+        # The package table is not changed by the truck.
+        self.assertEqual(self.packages[pkg_id].address, old_address)
+
+    def test_remove_drops_the_stop_from_the_rest_of_the_route(self):
+        truck = self.make_truck(self.IDS)
+        pkg_id = self.last_delivered(truck)
+        node = _delivery(truck, pkg_id).node
+        time = truck.events().events[2].time + 1.0
+        kept = truck.events().count_before(time) + 1
+        old_route = list(truck.route)
+
+        removed = truck.remove_package(pkg_id, time)
+
+        self.assertEqual(removed.id, pkg_id)
+        self.assertEqual(truck.route[:kept], old_route[:kept])
+        self.assertIsNone(_delivery(truck, pkg_id))
+        if node not in truck.packages_by_node:
+            self.assertNotIn(node, truck.route[kept:-1])
+
+    def test_insert_before_departure(self):
+        truck = self.make_truck([2, 4, 5, 7])
+        truck.insert_package(self.packages[40], 480.0)
+        delivery = _delivery(truck, 40)
+        self.assertEqual(delivery.node, self.packages[40].node)
+        self.assertEqual(truck.route[0], truck.route[-1])
+
+    def test_changes_after_the_fact_raise(self):
+        truck = self.make_truck([2, 4, 5, 7])
+        first = min((2, 4, 5, 7), key=lambda id: _delivery(truck, id).time)
+        after = _delivery(truck, first).time + 1.0
+        with self.assertRaises(ValueError):
+            truck.readdress_package(first, self.packages[40].address, after)
+        with self.assertRaises(ValueError):
+            truck.remove_package(first, after)
+        # The truck left at 8:00 am.
+        with self.assertRaises(ValueError):
+            truck.insert_package(self.packages[40], 481.0)
+
+
+class DeliveryIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.city = City(os.path.join(_ROOT, "distances.csv"), os.path.join(_ROOT, "locations.csv"))
+        cls.packages = Packages(os.path.join(_ROOT, "packages.csv"), city=cls.city)
+
+    def test_format_matches_status_at_time(self):
+        planner = LoadPlanner(self.city, self.packages, trucks={1: 480.0, 2: 545.0, 3: 620.0})
+        trucks = []
+        for load in planner.plan():
+            truck = Truck(load.truck_id, [self.packages[id] for id in load.package_ids], self.city, load.departure)
+            truck.route = load.route
+            trucks.append(truck)
+        # Re-address the package delivered last on the first truck halfway through its route, so the listed
+        # address depends on the time.
+        changed = max(trucks[0].packages, key=lambda pkg: _delivery(trucks[0], pkg.id).time).id
+        trucks[0].readdress_package(changed, self.packages[40].address, trucks[0].events().events[3].time + 1.0)
+        index = DeliveryIndex(trucks)
+
+        self.assertEqual(len(index), len(self.packages))
+        self.assertNotIn(0, index)
+        with self.assertRaises(KeyError):
+            index.format(0, 600.0)
+
+        times = sorted({event.time for truck in trucks for event in truck.events()})
+        for time in [470.0, 544.9, 545.0, 620.0, 900.0] + [time + offset for time in times for offset in (-0.01, 0.0)]:
+            for truck in trucks:
+                for line in truck.status_at_time(time)[2:]:
+                    pkg_id = int(re.match(r"\tPackage #(\d+),", line).group(1))
+                    with self.subTest(time=time, pkg_id=pkg_id):
+                        self.assertEqual(index.format(pkg_id, time), line[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+from math import inf
+
+from city import City
+from custom_types import VehicleProfile
+
+# Insertions that leave less than this many minutes of slack are treated as late, so that rounding in the arrival
+# times never turns an accepted insertion into a missed deadline.
+_EPSILON = 1e-9
+
+
+def time_window_route(
+    city: City, packages, start_time: float, depot: int = 0, profile: VehicleProfile | None = None
+) -> list:
+    """
+    Builds a route that delivers every package by its deadline, by cheapest insertion.
+
+    Every node must be reached by the earliest deadline of its packages. Nodes are inserted one at a time, the
+    earliest deadline first (and among equal deadlines the farthest from the depot first), at the position that adds
+    the fewest miles without making any stop late. The route keeps, for every position, its arrival time and its
+    slack: how many minutes every later stop could be delayed before one of them misses its deadline. Checking an
+    insertion is then O(1), since it only delays the stops after it, and the bookkeeping is rebuilt in O(n) after
+    each insertion.
+
+    Args:
+        city (City): The city whose distances are used.
+        packages (Iterable[Package]): The packages to deliver, with their nodes resolved.
+        start_time (float): The time the truck leaves the depot, in minutes since the start of the day.
+        depot (int, optional): The node the route starts and ends at.
+        profile (VehicleProfile, optional): The speed and service time of the truck.
+
+    Returns:
+        list: The route, as a list of node indexes starting and ending at the depot.
+
+    Raises:
+        ValueError: If a package cannot be delivered by its deadline, or arrives at the hub after the truck leaves.
+    """
+
+    d = city.distance_between
+
+    due = City.deadlines_by_node(packages)
+    for pkg in packages:
+        if start_time < pkg.earliest_availability:
+            raise ValueError(f"Package {pkg.id} is not at the hub before the truck leaves.")
+    if due.get(depot, inf) < start_time:
+        raise ValueError(f"Packages for node {depot} are due before the truck leaves.")
+    due.pop(depot, None)
+
+    route = [depot, depot]
+    arrival, slack = _schedule(city, route, due, start_time, profile)
+
+    for node in sorted(due, key=lambda node: (due[node], -d(depot, node))):
+        at = _cheapest_position(city, route, node, due[node], arrival, slack, 1, profile)
+        if at is None:
+            raise ValueError(f"No route reaches node {node} by {due[node]:.0f} minutes without missing a deadline.")
+        route.insert(at, node)
+        arrival, slack = _schedule(city, route, due, start_time, profile)
+
+    return route
+
+
+def insert_node(
+    city: City,
+    route: list,
+    node: int,
+    start_time: float,
+    due: dict | None = None,
+    first: int = 1,
+    profile: VehicleProfile | None = None,
+) -> list:
+    """
+    Inserts node into a route at the position that adds the fewest miles, leaving the stops before position first
+    where they are.
+
+    Used to repair a route that is already being driven: first is the position of the next stop the truck has not
+    reached yet, and the stops before it cannot change. With due, positions that would make a stop miss its
+    deadline are skipped; each position is checked in O(1), as in time_window_route.
+
+    Args:
+        city (City): The city whose distances are used.
+        route (list): The route, as a list of node indexes starting and ending at the depot.
+        node (int): The node to insert.
+        start_time (float): The time the truck left the depot, in minutes since the start of the day.
+        due (dict, optional): The deadline of every node, as returned by City.deadlines_by_node.
+        first (int, optional): The first position node may be inserted at.
+        profile (VehicleProfile, optional): The speed and service time of the truck.
+
+    Returns:
+        list: A new route with node inserted.
+
+    Raises:
+        ValueError: If every position would make a stop miss its deadline.
+    """
+
+    if due is None:
+        due = {}
+    arrival, slack = _schedule(city, route, due, start_time, profile)
+    at = _cheapest_position(city, route, node, due.get(node, inf), arrival, slack, max(first, 1), profile)
+    if at is None:
+        raise ValueError(f"Node {node} cannot be added to the route without missing a deadline.")
+    return route[:at] + [node] + route[at:]
+
+
+def _cheapest_position(
+    city: City,
+    route: list,
+    node: int,
+    deadline: float,
+    arrival: list,
+    slack: list,
+    first: int,
+    profile: VehicleProfile | None = None,
+) -> int | None:
+    """
+    Returns the position at or after first where inserting node adds the fewest miles without missing a deadline,
+    or None if there is none. A new stop delays every later one by the extra driving time and one service time.
+    """
+
+    d = city.distance_between
+    minutes = (profile or VehicleProfile()).minutes
+    service = profile.service_minutes if profile is not None else 0.0
+
+    best, at = inf, None
+    for i in range(first - 1, len(route) - 1):
+        a, b = route[i], route[i + 1]
+        if deadline < arrival[i] + (service if i else 0.0) + minutes(d(a, node)) + _EPSILON:
+            continue
+        added = d(a, node) + d(node, b) - d(a, b)
+        if added < best and minutes(added) + service + _EPSILON <= slack[i + 1]:
+            best, at = added, i + 1
+    return at
+
+
+def _schedule(
+    city: City, route: list, due: dict, start_time: float, profile: VehicleProfile | None = None
+) -> tuple[list, list]:
+    """
+    Returns the arrival time at every position of route, as City.time_at_each_stop works them out, and the slack of
+    every position: the smallest margin between deadline and arrival over that position and all later ones.
+    """
+
+    arrival = [start_time]
+    if 1 < len(route):
+        arrival += city.time_at_each_stop(route, start_time, profile)
+
+    slack = [inf] * len(route)
+    following = inf
+    for i in range(len(route) - 1, -1, -1):
+        following = min(following, due.get(route[i], inf) - arrival[i])
+        slack[i] = following
+    return arrival, slack
@@ -1,45 +1,120 @@
-import copy
 from city import City
-from datetime import datetime
+from custom_types import PackageStatus, RouteImprovement, VehicleProfile
+from hash_table import HashTable
+from held_karp import held_karp
+from local_search import improve_route
 from math import inf
+from packages import DeliveryState, Package
+from simulation import EventLog, simulate
+from time_windows import insert_node, time_window_route
+
+# The length of the neighbor lists the nearest neighbor route is built from.
+_NEIGHBORS = 16
 
 
 class Truck:
-    def __init__(self, id: int, packages: list, city: City, start_time: float) -> None:
+    def __init__(
+        self,
+        id: int,
+        packages: list[Package],
+        city: City,
+        start_time: float,
+        exact_limit: int = 0,
+        time_windows: bool = False,
+        depot: int = 0,
+        profile: VehicleProfile | None = None,
+    ) -> None:
         self.id = id
+        self.depot = depot
+        # The speed, capacity and service time of the truck, used for every arrival time and capacity check.
+        self.profile = profile or VehicleProfile()
+        self.exact_limit = exact_limit
+        self.time_windows = time_windows
 
         self.packages = packages
-        self.delivered_packages: list = []
-        self.undelivered_packages = copy.deepcopy(self.packages)
-        for pkg in self.undelivered_packages:
-            pkg["delivery_status"] = "En route"
+        # The IDs of the packages for every node, in load order. Built once; delivering never scans the packages.
+        self.packages_by_node: dict[int, list[int]] = {}
+        for pkg in self.packages:
+            if pkg.node is None:
+                pkg.node = city.address_to_node(pkg.address)
+            self.packages_by_node.setdefault(pkg.node, []).append(pkg.id)
+        self._by_id: dict[int, Package] = {pkg.id: pkg for pkg in self.packages}
+        # The total weight on board, kept up to date as packages are loaded and removed.
+        self.weight: float = sum(pkg.weight for pkg in self.packages)
+        self._check_capacity(0, 0.0)
+        # The packages themselves are never modified; the step by step simulation keeps its changes here.
+        self.state = DeliveryState(default_status="En route")
+
+        self._due: dict = City.deadlines_by_node(self.packages)
+        # Packages changed during the day, and the time of the change; they are only delivered after it.
+        self.ready_at: dict[int, float] = {}
+        # The earlier addresses of re-addressed packages, as (time of the change, previous address) pairs.
+        self._address_history: dict[int, list[tuple[float, str]]] = {}
+        # The fields of packages changed on this truck during the day. A changed package is replaced on the truck by
+        # a view through this state, so the records it shares with the package table and other trucks are untouched.
+        self.changes = DeliveryState()
 
         self.city = city
         self.start_time = start_time
         self.time = start_time
 
-        self.speed: float = 18.0
-        self.location: int = 0
+        self.speed: float = self.profile.speed
+        self.location: int = depot
         self.index: int = 1
+        self._events: EventLog | None = None
         self.route: list = self.find_route()
         self.route_length: float = self.get_route_length()
         self.destinations: set = self.get_delivery_nodes()
         self.distance_travelled: float = 0.0
 
+    @property
+    def route(self) -> list:
+        return self._route
+
+    @route.setter
+    def route(self, route: list) -> None:
+        self._route = route
+        self._events = None  # the event log is simulated again for the new route
+
+    def events(self) -> EventLog:
+        """
+        Returns the truck's event log for its current route, one event per stop in order of arrival.
+
+        The day is only simulated the first time this is called after the route changes.
+        """
+
+        if self._events is None:
+            self._events = simulate(self.city, [self])
+        return self._events
+
     def reset(self):
         """
         Resets the truck back to its initial starting position, time, and status.
         """
 
-        self.location = 0
+        self.location = self.depot
         self.distance_travelled = 0.0
-        self.delivered_packages = []
-        self.undelivered_packages = copy.deepcopy(self.packages)
-        for pkg in self.undelivered_packages:
-            pkg["delivery_status"] = "En route"
+        self.state = DeliveryState(default_status="En route")
         self.time = self.start_time
         self.index = 1
 
+    @property
+    def delivered_packages(self) -> list:
+        """
+        The delivered packages, as seen by the current simulation, in delivery order.
+        """
+
+        return [self.state.view(self._by_id[id]) for id in self.state.delivered]
+
+    @property
+    def undelivered_packages(self) -> list:
+        """
+        The packages still on the truck, as seen by the current simulation, in load order.
+        """
+
+        delivered = self.state.delivered
+        return [self.state.view(pkg) for pkg in self.packages if pkg.id not in delivered]
+
     def _finished_route(self) -> bool:
         """
         Determines if the route has been completed. If the index is equal to the length of the route, then all nodes have been visited.
@@ -64,7 +139,8 @@ class Truck:
 
         self.distance_travelled += self.city.distance_between(self.location, node)
         self.time = (
-            self.city._convert_miles_to_minutes(self.distance_travelled)
+            self.city._convert_miles_to_minutes(self.distance_travelled, self.profile)
+            + self.profile.service_minutes * (self.index - 1)
             + self.start_time
         )
         self.location = node
@@ -80,14 +156,15 @@ class Truck:
         If there are no packages at the current location, returns None.
         """
 
-        pkgs = []
-
         if loc is None:
             loc = self.location
 
-        for pkg in self.undelivered_packages:
-            if self.city.address_to_node(pkg["address"]) == loc:
-                pkgs.append(pkg)
+        delivered = self.state.delivered
+        pkgs = [
+            self.state.view(self._by_id[id])
+            for id in self.packages_by_node.get(loc, ())
+            if id not in delivered
+        ]
 
         if pkgs == []:
             return None
@@ -98,8 +175,8 @@ class Truck:
         """
         Delivers packages at the current location.
 
-        This method updates the delivery status of each package at the current location to "Delivered at {current_time}".
-        It then moves the delivered packages from the undelivered_packages list to the delivered_packages list.
+        This method records each package at the current location as delivered in the truck's DeliveryState, with the
+        status "Delivered at {current_time}". The packages themselves are not modified.
 
         Returns:
             None
@@ -109,61 +186,375 @@ class Truck:
 
         if pkgs_to_deliver:
             for pkg in pkgs_to_deliver:
-                pkg["delivery_status"] = f"Delivered at {formattime(self.time)}"
-                self.delivered_packages.append(pkg)
-                self.undelivered_packages.remove(pkg)
+                self.state.deliver(pkg.id, self.time, f"Delivered at {formattime(self.time)}")
 
     def get_delivery_nodes(self) -> set:
         """
         Returns a set of all of the nodes that the truck must visit in order to deliver all of its packages.
         """
 
-        nodes = set()
-        for package in self.packages:
-            nodes.add(self.city.address_to_node(package["address"]))
-        return nodes
+        return set(self.packages_by_node)
 
     def get_delivered_package_ids(self) -> list:
         """
         Returns a list of the delivered packages' IDs.
         """
 
-        return [pkg["id"] for pkg in self.delivered_packages]
+        return list(self.state.delivered)
 
-    def _nearest_neighbor(self, destinations: list) -> int:
+    def _nearest_neighbor(self, destinations: list, origin: int | None = None) -> int:
         """
-        Returns the int representing the nearest node to the truck's current location.
+        Returns the int representing the nearest node to origin, which defaults to the truck's current location.
 
         Takes a list representing possible destinations that route requires.
         """
 
         nearest = None
         min_distance = inf
+        if origin is None:
+            origin = self.location
 
         for destination in destinations:
-            distance = self.city[self.location][destination]
+            distance = self.city.distance_between(origin, destination)
             if distance < min_distance:
                 min_distance = distance
                 nearest = destination
 
         return nearest
 
-    def find_route(self) -> list:
+    def find_route(self, exact_limit: int | None = None) -> list:
         """
         Given the packages, find a route that delivers all of the packages while respecting constriants.
+
+        Routes are built with nearest neighbor. If the truck has at most exact_limit delivery nodes (defaults to the
+        truck's exact_limit), the optimal route is found with held_karp instead; it is only used if it is on time
+        whenever the nearest neighbor route is.
+
+        If the truck routes with time windows, the shortest on-time route among a time_window_route, the nearest
+        neighbor route and (within exact_limit) the optimal route is used instead.
+
+        Raises:
+            ValueError: If the truck routes with time windows and no route delivers every package on time, or a
+                package arrives at the hub after the truck leaves.
+        """
+
+        if exact_limit is None:
+            exact_limit = self.exact_limit
+
+        route = self._nearest_neighbor_route()
+        exact_route = None
+        if len(self.get_delivery_nodes()) <= exact_limit:
+            exact_route = held_karp(self.city, self.get_delivery_nodes(), self.depot).route
+
+        if self.time_windows:
+            return self._time_window_route(route, exact_route)
+
+        if exact_route is not None:
+            if self.is_on_time(exact_route) or not self.is_on_time(route):
+                route = exact_route
+
+        return route
+
+    def _time_window_route(self, *candidates: list | None) -> list:
+        """
+        Returns the shortest on-time route among a time_window_route and the given candidate routes.
         """
 
-        route = [0]
-        destinations = self.get_delivery_nodes()
+        for pkg in self.packages:
+            if self.start_time < pkg.earliest_availability:
+                raise ValueError(f"Package {pkg.id} is not at the hub before truck {self.id} leaves.")
+
+        routes = [route for route in candidates if route is not None]
+        try:
+            routes.append(time_window_route(self.city, self.packages, self.start_time, self.depot, self.profile))
+        except ValueError:
+            pass  # one of the other candidates may still be on time
+
+        on_time = [route for route in routes if self.is_on_time(route)]
+        if not on_time:
+            raise ValueError(f"Truck {self.id} cannot deliver every package by its deadline.")
+        return min(on_time, key=self.city.route_length)
+
+    def is_on_time(self, route: list | None = None) -> bool:
+        """
+        Returns whether a route (defaults to the truck's route) delivers every package on the truck by its deadline.
+        """
+
+        if route is None:
+            route = self.route
+        return self.city.route_meets_deadlines(route, self._due, self.start_time, self.profile)
+
+    def optimality_gap(self) -> float:
+        """
+        Returns how much longer the nearest neighbor route is than the optimal route, as a fraction of the optimal
+        route's length (0.1 means 10% longer).
+
+        The optimal route is found with held_karp, so this is only practical for trucks with up to about 15
+        delivery nodes.
+        """
+
+        greedy_length = self.city.route_length(self._nearest_neighbor_route())
+        optimal_length = held_karp(self.city, self.get_delivery_nodes(), self.depot).length
+        if optimal_length == 0.0:
+            return 0.0
+        return (greedy_length - optimal_length) / optimal_length
+
+    def _nearest_neighbor_route(self) -> list:
+        """
+        Builds a route by repeatedly driving to the nearest delivery node not yet visited.
+
+        With NumPy, each step takes the first unvisited delivery node in the current node's cached city-wide
+        neighbor list (see City.nearest_nodes), which is shared by every truck and route built in the city, and only
+        scans every unvisited node when none is in the list. Without NumPy, computing the lists costs more than the
+        scans they save, so every step scans.
+        """
+
+        city = self.city
+        route = [self.depot]
+        destinations = self.get_delivery_nodes() - {self.depot}
         while destinations:
-            nearest = self._nearest_neighbor(destinations)
+            nearest = None
+            if city.uses_numpy:
+                near = city.nearest_nodes(route[-1], _NEIGHBORS)
+                nearest = next((node for node in near if node in destinations), None)
+            if nearest is None:
+                nearest = self._nearest_neighbor(destinations, origin=route[-1])
             destinations.remove(nearest)
             route.append(nearest)
-            self.location = nearest
-        route.append(0)  # return to hub after deliveries are completed
+        route.append(self.depot)  # return to hub after deliveries are completed
+
+        return route
+
+    def improve_route(
+        self, time_budget: float | None = None, max_iterations: int | None = None
+    ) -> RouteImprovement:
+        """
+        Shortens the truck's route with 2-opt and Or-opt local search and makes the result the truck's route.
+
+        If the current route delivers every package on time (as checked by is_on_time), or the truck routes with
+        time windows, only moves that keep it on time are applied.
+
+        Args:
+            time_budget (float, optional): The maximum number of seconds to search for.
+            max_iterations (int, optional): The maximum number of improving moves to apply.
+
+        Returns:
+            RouteImprovement: The new route, the miles saved and the number of moves applied.
+        """
+
+        is_feasible = None
+        if self.time_windows or self.is_on_time():
+            is_feasible = self.is_on_time
+
+        result = improve_route(
+            self.city, self.route, is_feasible, time_budget, max_iterations
+        )
+        self.route = result.route
+        self.route_length = self.get_route_length()
+        return result
+
+    def insert_package(self, pkg: Package, time: float) -> None:
+        """
+        Loads a package that reached the hub late onto the truck and adds its stop to the route.
+
+        The stop is inserted where it adds the fewest miles (without missing a deadline, if the truck routes with
+        time windows); the rest of the route is left as it is.
+
+        Args:
+            pkg (Package): The package to load.
+            time (float): The time the package is loaded, in minutes since the start of the day.
+
+        Raises:
+            ValueError: If the truck has already left the hub, the package is already on the truck, does not fit on
+                it, or the stop cannot be added without missing a deadline.
+        """
+
+        if self.start_time < time:
+            raise ValueError(f"Truck {self.id} has already left the hub.")
+        if pkg.id in self._by_id:
+            raise ValueError(f"Package {pkg.id} is already on truck {self.id}.")
+        self._check_capacity(1, pkg.weight)
+        if pkg.node is None:
+            pkg.node = self.city.address_to_node(pkg.address)
+
+        due = dict(self._due)
+        due[pkg.node] = min(due.get(pkg.node, inf), pkg.deadline)
+        route = self._repair(self.route, pkg.node, 1, due)
+
+        self.packages.append(pkg)
+        self._by_id[pkg.id] = pkg
+        self.weight += pkg.weight
+        self.packages_by_node.setdefault(pkg.node, []).append(pkg.id)
+        self._due = City.deadlines_by_node(self.packages)
+        self._set_route(route)
+
+    def remove_package(self, pkg_id: int, time: float) -> Package:
+        """
+        Takes a package off the truck's plan from the given time on. If no other package needs its stop, the stop
+        is dropped from the part of the route the truck has not driven yet.
 
+        Args:
+            pkg_id (int): The ID of the package.
+            time (float): The time of the change, in minutes since the start of the day.
+
+        Returns:
+            Package: The removed package.
+
+        Raises:
+            KeyError: If the package is not on the truck.
+            ValueError: If the package has already been delivered at that time.
+        """
+
+        pkg = self._by_id[pkg_id]
+        self._check_undelivered(pkg_id, time)
+        first = self._next_position(time)
+
+        self.packages.remove(pkg)
+        del self._by_id[pkg_id]
+        self.weight -= pkg.weight
+        self._unindex(pkg)
+        self.ready_at.pop(pkg_id, None)
+        self._due = City.deadlines_by_node(self.packages)
+        self._set_route(self._drop_unused(self.route, pkg.node, first))
+        return pkg
+
+    def readdress_package(self, pkg_id: int, address: str, time: float) -> None:
+        """
+        Changes the address of a package on the truck during the day and repairs the rest of the route.
+
+        The old stop is dropped if no other package needs it, and the new one is inserted after the next stop the
+        truck has not reached yet, where it adds the fewest miles (without missing a deadline, if the truck routes
+        with time windows). Status queries before time still show the old address. The change is only seen by this
+        truck; the package record itself is not modified.
+
+        Args:
+            pkg_id (int): The ID of the package.
+            address (str): The new address.
+            time (float): The time of the change, in minutes since the start of the day.
+
+        Raises:
+            KeyError: If the package is not on the truck or the address is unknown.
+            ValueError: If the package has already been delivered at that time, or the new stop cannot be added
+                without missing a deadline.
+        """
+
+        pkg = self._by_id[pkg_id]
+        self._check_undelivered(pkg_id, time)
+        node = self.city.address_to_node(address)
+        first = self._next_position(time)
+
+        self._unindex(pkg)
+        route = self._drop_unused(self.route, pkg.node, first)
+        due = City.deadlines_by_node(other for other in self.packages if other is not pkg)
+        due[node] = min(due.get(node, inf), pkg.deadline)
+        try:
+            route = self._repair(route, node, first, due)
+        except ValueError:
+            self.packages_by_node.setdefault(pkg.node, []).append(pkg_id)
+            raise
+
+        if pkg_id not in self._address_history:
+            view = self.changes.view(pkg)
+            self.packages[self.packages.index(pkg)] = view
+            self._by_id[pkg_id] = view
+        self._address_history.setdefault(pkg_id, []).append((time, pkg.address))
+        self.changes.set(pkg_id, "address", address)
+        self.changes.set(pkg_id, "node", node)
+        self.packages_by_node.setdefault(node, []).append(pkg_id)
+        self.ready_at[pkg_id] = time
+        self._due = City.deadlines_by_node(self.packages)
+        self._set_route(route)
+
+    def address_at(self, pkg: Package, time: float) -> str:
+        """
+        Returns the address a package on the truck was listed under at the given time.
+        """
+
+        for changed, previous in self._address_history.get(pkg.id, ()):
+            if time < changed:
+                return previous
+        return pkg.address
+
+    def _next_position(self, time: float) -> int:
+        """
+        Returns the position in the route of the first stop that can still change at time. The truck finishes the
+        leg it is driving, so the stop it is heading to is kept.
+
+        Raises:
+            ValueError: If the truck is already on its way back to the hub.
+        """
+
+        if time <= self.start_time:
+            return 1
+        first = self.events().count_before(time) + 1
+        if len(self.route) - 1 < first:
+            raise ValueError(f"Truck {self.id} has finished its deliveries.")
+        return first
+
+    def _check_undelivered(self, pkg_id: int, time: float) -> None:
+        """
+        Raises ValueError if the package was delivered before time.
+        """
+
+        log = self.events()
+        for event in log.events[: log.count_before(time)]:
+            if pkg_id in event.package_ids:
+                raise ValueError(f"Package {pkg_id} was delivered at {formattime(event.time)}.")
+
+    def _unindex(self, pkg: Package) -> None:
+        ids = self.packages_by_node[pkg.node]
+        ids.remove(pkg.id)
+        if not ids:
+            del self.packages_by_node[pkg.node]
+
+    def _drop_unused(self, route: list, node: int, first: int) -> list:
+        """
+        Removes node from the part of route from position first on, unless a package still needs it.
+        """
+
+        if node in self.packages_by_node or node not in route[first:-1]:
+            return route
+        return route[:first] + [stop for stop in route[first:-1] if stop != node] + route[-1:]
+
+    def _repair(self, route: list, node: int, first: int, due: dict) -> list:
+        """
+        Inserts node into route at or after position first by cheapest insertion. If node is already a stop from
+        position first on, the route is kept as it is.
+
+        Raises:
+            ValueError: If the truck routes with time windows and node cannot be reached by its deadline in due.
+        """
+
+        if not self.time_windows:
+            due = None
+        if node not in route[first:-1]:
+            return insert_node(self.city, route, node, self.start_time, due, first, self.profile)
+
+        if due is not None:
+            at = route.index(node, first)
+            arrival = self.city.time_at_each_stop(route[: at + 1], self.start_time, self.profile)[-1]
+            if due.get(node, inf) < arrival:
+                raise ValueError(f"Node {node} is already on the route, but is reached after its deadline.")
         return route
 
+    def _check_capacity(self, packages: int, weight: float) -> None:
+        """
+        Checks in O(1) that the truck can take packages more packages weighing weight in total.
+
+        Raises:
+            ValueError: If the package count or the weight would exceed the truck's profile.
+        """
+
+        if self.profile.max_packages < len(self.packages) + packages:
+            raise ValueError(f"Truck {self.id} holds at most {self.profile.max_packages} packages.")
+        if self.profile.max_weight < self.weight + weight:
+            raise ValueError(f"Truck {self.id} carries at most {self.profile.max_weight} kg.")
+
+    def _set_route(self, route: list) -> None:
+        self.route = route
+        self.route_length = self.get_route_length()
+        self.destinations = self.get_delivery_nodes()
+
     def next(self) -> None:
         """
         This function calls other functions to simulate the truck driving to the next location, delivering the appropriate package, and then updating the route to account for the visited node.
@@ -179,67 +570,106 @@ class Truck:
         self.index += 1
         self.deliver()
 
-    def status_at_time(self, end_time: float) -> str:
-        """
-        Returns a formatted string that displays the projected status of a truck at the specified time.
+    def status_at_time(self, end_time: float) -> list:
         """
+        Returns formatted lines that display the projected status of a truck at the specified time.
 
-        if self.route == []:
-            self.find_route()
-        end_time_in_datetime = datetime.strptime(
-            formattime(end_time), "%I:%M %p"
-        ).time()
-        start_time_in_datetime = datetime.strptime(
-            formattime(self.start_time), "%I:%M %p"
-        ).time()
-        route_distances = self.city.cumulative_distances(self.route)
-        route_distances.insert(0, 0)
-        route_times = self.city.cumulative_times(self.route, start_time_in_datetime)
+        The status is read from the truck's event log with a binary search, so the route is not simulated again
+        and no package is modified.
+        """
 
         output = ["\n", ""]
 
-        if end_time <= 619.0:
-            for pkg in self.undelivered_packages:
-                if pkg["id"] == 9:
-                    pkg["address"] = "300 State St"
-
         if end_time < self.start_time:
             output[1] = f"Truck {self.id} has not left the depot."
-            for pkg in self.undelivered_packages:
-                pkg["delivery_status"] = "At the hub"
-                output.append(f"\t{formatpkg(pkg)}")
+            for pkg in self.packages:
+                output.append(f"\t{formatpkg(pkg, 'At the hub', self.address_at(pkg, end_time))}")
             return output
 
-        for i in range(len(self.route)):
-            current_time = route_times[i]
-
-            if current_time < end_time_in_datetime:
-                pkgs = self.packages_at_location(self.route[i])
-                self.distance_travelled = route_distances[i]
-                if pkgs:
-                    for pkg in pkgs:
-                        pkg[
-                            "delivery_status"
-                        ] = f"Delivered at {current_time.strftime("%I:%M %p")}"
-                        self.undelivered_packages.remove(pkg)
-                        self.delivered_packages.append(pkg)
-
-            if end_time_in_datetime < current_time:
-                today = datetime.now().date()
-                curr_dt = datetime.combine(today, current_time)
-                end_dt = datetime.combine(today, end_time_in_datetime)
-                diff = end_dt - curr_dt
-                self.distance_travelled += self.speed * (diff.total_seconds() / 3600)
-
-                break
-
-        for pkg in self.delivered_packages + self.undelivered_packages:
-            output.append(f"\t{formatpkg(pkg)}")
-
-        output[1] = f"Truck {self.id}: {round(self.distance_travelled, 2)} miles"
+        log = self.events()
+        reached = log.count_before(end_time)
+
+        distance_travelled = 0.0
+        if reached == len(log):
+            distance_travelled = log.events[-1].miles
+        elif reached:
+            last = log.events[reached - 1]
+            # The truck stays at every stop after the depot for its service time before driving on.
+            driving = end_time - last.time - (self.profile.service_minutes if 1 < reached else 0.0)
+            distance_travelled = last.miles + self.speed * max(driving, 0.0) / 60.0
+
+        by_id = {pkg.id: pkg for pkg in self.packages}
+        delivered = {}
+        for event in log.events[:reached]:
+            for id in event.package_ids:
+                delivered[id] = event.time
+
+        for id, time in delivered.items():
+            pkg = by_id[id]
+            output.append(f"\t{formatpkg(pkg, f'Delivered at {formatclock(time)}', self.address_at(pkg, end_time))}")
+        for pkg in self.packages:
+            if pkg.id not in delivered:
+                output.append(f"\t{formatpkg(pkg, 'En route', self.address_at(pkg, end_time))}")
+
+        output[1] = f"Truck {self.id}: {round(distance_travelled, 2)} miles"
         return output
 
 
+class DeliveryIndex:
+    """
+    The planned status of every package on a set of trucks: the package, its truck, the time it is loaded (the
+    truck's departure) and the time it is delivered, keyed by package ID.
+
+    Built once from the trucks' event logs. Asking for one package's status at any time is then a single hash table
+    lookup and comparison, instead of running status_at_time for every truck.
+    """
+
+    def __init__(self, trucks: list) -> None:
+        self._records = HashTable()
+        for truck in trucks:
+            delivered = {id: event.time for event in truck.events() for id in event.package_ids}
+            for pkg in truck.packages:
+                self._records[pkg.id] = PackageStatus(pkg, truck, truck.start_time, delivered.get(pkg.id))
+
+    def __contains__(self, pkg_id: int) -> bool:
+        return pkg_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, pkg_id: int) -> PackageStatus:
+        record = self._records[pkg_id]
+        if record is None:
+            raise KeyError(pkg_id)
+        return record
+
+    def status(self, pkg_id: int, time: float) -> str:
+        """
+        Returns the status of a package at time, as status_at_time shows it.
+
+        Raises:
+            KeyError: If the package is not on any of the trucks.
+        """
+
+        record = self[pkg_id]
+        if time < record.load_time:
+            return "At the hub"
+        if record.delivery_time is not None and record.delivery_time < time:
+            return f"Delivered at {formatclock(record.delivery_time)}"
+        return "En route"
+
+    def format(self, pkg_id: int, time: float) -> str:
+        """
+        Returns the status line of a package at time, with the address it was listed under at that time.
+
+        Raises:
+            KeyError: If the package is not on any of the trucks.
+        """
+
+        record = self[pkg_id]
+        return formatpkg(record.package, self.status(pkg_id, time), record.truck.address_at(record.package, time))
+
+
 def formattime(minutes: float) -> str:
     minutes = int(minutes)  # Convert minutes to an integer
     hours, minutes = divmod(minutes, 60)
@@ -256,5 +686,19 @@ def formattime(minutes: float) -> str:
     return formatted_time
 
 
-def formatpkg(pkg) -> str:
-    return f"Package #{pkg["id"]}, deadline: {formattime(pkg["deadline"])}, status: [{pkg["delivery_status"]}], destination: [{pkg["address"]}, {pkg["city"]} {pkg["state"]} {pkg["zipcode"]}], weight: {pkg["weight"]}kg, notes: \"{pkg["notes"]}\""
+def formatclock(minutes: float) -> str:
+    """
+    Formats a number of minutes since the start of the day as a zero padded clock time, like 09:05 AM.
+    """
+
+    hours, minutes = divmod(int(minutes), 60)
+    hours %= 24
+    return f"{(hours - 1) % 12 + 1:02d}:{minutes:02d} {'AM' if hours < 12 else 'PM'}"
+
+
+def formatpkg(pkg: Package, status: str | None = None, address: str | None = None) -> str:
+    if status is None:
+        status = pkg.delivery_status
+    if address is None:
+        address = pkg.address
+    return f"Package #{pkg.id}, deadline: {formattime(pkg.deadline)}, status: [{status}], destination: [{address}, {pkg.city} {pkg.state} {pkg.zipcode}], weight: {pkg.weight}kg, notes: \"{pkg.notes}\""